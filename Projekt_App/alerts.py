@@ -0,0 +1,157 @@
+import os
+import json
+import queue
+import threading
+import urllib.request
+from datetime import datetime
+
+# Konfiguracja
+ALERT_FILE = os.environ.get('ALERT_FILE', 'alerts.log')
+ALERT_WEBHOOK = os.environ.get('ALERT_WEBHOOK', '')  # np. http://127.0.0.1:8080/alert
+ALERT_COOLDOWN_S = 900  # minimalny odstęp między kolejnymi alarmami tej samej reguły
+
+# Reguły: wartość powyżej `threshold` przez `for_s` sekund włącza alarm,
+# spadek poniżej `clear` (histereza) go wyłącza
+RULES = [
+    {'name': 'co2_wysokie', 'metric': 'co2', 'threshold': 1200, 'clear': 1100, 'for_s': 600,
+     'message': "CO2 powyżej 1200 ppm od 10 minut - przewietrz pomieszczenie"},
+    {'name': 'co2_prognoza', 'metric': 'pred_co2', 'threshold': 1200, 'clear': 1150, 'for_s': 0,
+     'below': ('co2', 1200),
+     'message': "Prognoza: CO2 przekroczy 1200 ppm w ciągu 15 minut"},
+    {'name': 'pm25_wysokie', 'metric': 'pm25', 'threshold': 25, 'clear': 20, 'for_s': 300,
+     'message': "PM2.5 powyżej 25 µg/m³ od 5 minut"},
+]
+
+
+class Rule:
+    """Reguła progowa z czasem trwania, histerezą i deduplikacją - stały koszt na próbkę"""
+
+    __slots__ = ('name', 'metric', 'threshold', 'clear', 'for_s', 'below', 'message',
+                 'since', 'active', 'notified', 'last_fired')
+
+    def __init__(self, name, metric, threshold, clear, for_s=0, below=None, message=''):
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.clear = clear
+        self.for_s = for_s
+        self.below = below
+        self.message = message
+        self.since = None
+        self.active = False
+        self.notified = False
+        self.last_fired = None
+
+    def update(self, sample):
+        """Zwraca 'alarm', 'koniec' albo None"""
+        value = getattr(sample, self.metric)
+        if value is None:
+            return None  # brak danych nie zmienia stanu reguły
+
+        if self.active:
+            if value < self.clear:
+                self.active = False
+                self.since = None
+                return 'koniec' if self.notified else None
+            return None
+
+        condition = value > self.threshold
+        if condition and self.below:
+            other = getattr(sample, self.below[0])
+            condition = other is not None and other <= self.below[1]
+
+        if not condition:
+            self.since = None
+            return None
+
+        if self.since is None:
+            self.since = sample.ts
+        if sample.ts - self.since < self.for_s:
+            return None
+
+        self.active = True
+        self.notified = self.last_fired is None or sample.ts - self.last_fired >= ALERT_COOLDOWN_S
+        if not self.notified:
+            return None  # ten sam problem zgłoszony przed chwilą
+        self.last_fired = sample.ts
+        return 'alarm'
+
+
+class LogSink:
+    def send(self, event):
+        print(f"[ALARM] {event['time']} {event['rule']}: {event['state']} - {event['message']} ({event['value']})")
+
+
+class FileSink:
+    """Zdarzenia jako linie JSON dopisywane do pliku"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, event):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """POST JSON na wskazany adres - w osobnym wątku, żeby nie blokować pomiarów"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=100)
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def send(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            print("Kolejka webhooka pełna - alarm pominięty")
+
+    def _worker(self):
+        while True:
+            event = self.queue.get()
+            try:
+                req = urllib.request.Request(self.url, data=json.dumps(event).encode(),
+                                             headers={'Content-Type': 'application/json'})
+                urllib.request.urlopen(req, timeout=self.timeout).close()
+            except Exception as e:
+                print(f"Błąd webhooka: {e}")
+
+
+def default_sinks():
+    sinks = [LogSink()]
+    if ALERT_FILE:
+        sinks.append(FileSink(ALERT_FILE))
+    if ALERT_WEBHOOK:
+        sinks.append(WebhookSink(ALERT_WEBHOOK))
+    return sinks
+
+
+class AlertEngine:
+    """Sprawdza wszystkie reguły dla każdej nowej próbki i wysyła zmiany stanu do odbiorców"""
+
+    def __init__(self, rules=RULES, sinks=None):
+        self.rules = [Rule(**cfg) for cfg in rules]
+        self.sinks = default_sinks() if sinks is None else sinks
+
+    def process(self, sample):
+        events = []
+        for rule in self.rules:
+            state = rule.update(sample)
+            if state is None:
+                continue
+            event = {
+                'time': datetime.fromtimestamp(sample.ts).strftime('%Y-%m-%d %H:%M:%S'),
+                'rule': rule.name,
+                'state': state,
+                'value': getattr(sample, rule.metric),
+                'message': rule.message,
+            }
+            events.append(event)
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception as e:
+                    print(f"Błąd wysyłania alarmu: {e}")
+        return events
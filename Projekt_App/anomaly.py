@@ -0,0 +1,127 @@
+import math
+
+# Progi detektorów dla każdej kolumny:
+# zakres poprawnych wartości, maks. zmiana na sekundę, liczba identycznych próbek (zawieszenie),
+# czy liczyć z-score względem EWMA
+LIMITS = {
+    'co2':  {'lo': 350, 'hi': 10000, 'max_rate': 50.0, 'stuck_n': 30, 'zscore': True},
+    'temp': {'lo': -10, 'hi': 60, 'max_rate': 1.0, 'stuck_n': 60, 'zscore': True},
+    'hum':  {'lo': 0, 'hi': 100, 'max_rate': 2.0, 'stuck_n': 60, 'zscore': True},
+    'voc':  {'lo': 1, 'hi': 500, 'max_rate': None, 'stuck_n': None, 'zscore': False},
+    'pm10': {'lo': 0, 'hi': 1000, 'max_rate': None, 'stuck_n': None, 'zscore': False},
+    'pm25': {'lo': 0, 'hi': 1000, 'max_rate': None, 'stuck_n': None, 'zscore': False},
+    'pm100': {'lo': 0, 'hi': 1000, 'max_rate': None, 'stuck_n': None, 'zscore': False},
+}
+
+EWMA_ALPHA = 0.05
+EWMA_WARMUP = 30
+Z_MAX = 6.0
+PM_DROPOUT_MIN = 5  # zera z PMS po wcześniejszym PM2.5 >= tej wartości to błąd transmisji
+
+# Rodzaje błędów, po których wartość jest maskowana (NULL); pozostałe są tylko flagowane
+MASKED = {'range', 'stuck', 'rate', 'zero_dropout'}
+
+
+class MetricMonitor:
+    """Detektory strumieniowe O(1) dla jednej kolumny (zakres, zawieszenie, skok, z-score)"""
+
+    __slots__ = ('name', 'lo', 'hi', 'max_rate', 'stuck_n', 'zscore',
+                 'mean', 'var', 'count', 'last_raw', 'repeats')
+
+    def __init__(self, name, lo, hi, max_rate=None, stuck_n=None, zscore=False):
+        self.name = name
+        self.lo, self.hi = lo, hi
+        self.max_rate = max_rate
+        self.stuck_n = stuck_n
+        self.zscore = zscore
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.last_raw = None
+        self.repeats = 0
+
+    def check(self, value, prev, dt):
+        """Zwraca listę wykrytych błędów; prev to ostatnia zaakceptowana wartość z bufora"""
+        faults = []
+
+        # Zawieszony czujnik - ta sama surowa wartość przez stuck_n próbek
+        if value == self.last_raw:
+            self.repeats += 1
+        else:
+            self.repeats = 1
+            self.last_raw = value
+        if self.stuck_n and self.repeats >= self.stuck_n:
+            faults.append('stuck')
+
+        if not self.lo <= value <= self.hi:
+            faults.append('range')
+
+        if self.max_rate and prev is not None and dt and abs(value - prev) / dt > self.max_rate:
+            faults.append('rate')
+
+        if self.zscore and self.count >= EWMA_WARMUP and self.var > 0:
+            if abs(value - self.mean) / math.sqrt(self.var) > Z_MAX:
+                faults.append('zscore')
+
+        # Statystyki EWMA aktualizowane tylko wartościami, które nie zostaną zamaskowane
+        if not MASKED.intersection(faults):
+            if self.count == 0:
+                self.mean = value
+            else:
+                diff = value - self.mean
+                self.mean += EWMA_ALPHA * diff
+                self.var = (1 - EWMA_ALPHA) * (self.var + EWMA_ALPHA * diff * diff)
+            self.count += 1
+
+        return faults
+
+
+class FaultDetector:
+    """Sprawdza każdą próbkę przed zapisem i maskuje błędne wartości"""
+
+    def __init__(self, limits=LIMITS):
+        self.monitors = {name: MetricMonitor(name, **cfg) for name, cfg in limits.items()}
+        self.fault_counts = {}
+        self.pm_dropout = False
+        self.active = set()
+
+    def check(self, sample, buffer):
+        """Maskuje (None) błędne pola próbki i zwraca nowe zdarzenia (kolumna, rodzaj, wartość)
+
+        Błąd trwający przez kolejne próbki jest maskowany w każdej z nich,
+        ale zgłaszany jako zdarzenie tylko raz - w chwili wystąpienia.
+        """
+        events = []
+        has_prev = len(buffer) > 0
+        dt = sample.ts - buffer.get('ts') if has_prev else None
+
+        for name, monitor in self.monitors.items():
+            value = getattr(sample, name)
+            if value is None:
+                continue
+            prev = buffer.get(name) if has_prev else None
+            for kind in monitor.check(value, prev, dt):
+                events.append((name, kind, value))
+
+        # Zera z PMS5003 po błędzie portu szeregowego
+        if sample.pm10 == 0 and sample.pm25 == 0 and sample.pm100 == 0:
+            prev_pm25 = buffer.get('pm25') if has_prev else None
+            if self.pm_dropout or (prev_pm25 is not None and prev_pm25 >= PM_DROPOUT_MIN):
+                self.pm_dropout = True
+                events += [(name, 'zero_dropout', 0) for name in ('pm10', 'pm25', 'pm100')]
+        else:
+            self.pm_dropout = False
+
+        new_events = []
+        active = set()
+        for name, kind, value in events:
+            if kind in MASKED:
+                setattr(sample, name, None)
+            key = (name, kind)
+            active.add(key)
+            if key not in self.active:
+                new_events.append((name, kind, value))
+                self.fault_counts[key] = self.fault_counts.get(key, 0) + 1
+        self.active = active
+
+        return new_events
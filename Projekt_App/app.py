@@ -1,18 +1,29 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 import sqlite3
 from datetime import datetime, timedelta
+import profiling
+import uplink
+import partitions
+import stats_sketch
+import forecast
 
 app = Flask(__name__)
+# Opcjonalne profilowanie: PROFILE_SQL=1 (wolne zapytania), PROFILE_REQUESTS=1 (cProfile)
+profiling.init_app(app)
 
 def get_db_connection():
-    conn = sqlite3.connect('sensors.db')
+    conn = profiling.connect('sensors.db')
     conn.row_factory = sqlite3.Row
     return conn
 
-def get_val_ago(conn, sensor, hours):
+def readings_table(conn, hours=24):
+    """Tabela pomiarów z ostatnich `hours` godzin (readings albo widok partycji miesięcznych)"""
+    return partitions.attach_hours(conn, 'sensors.db', hours)
+
+def get_val_ago(conn, sensor, hours, table='readings'):
     target_time = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
     row = conn.execute(f'''
-        SELECT AVG({sensor}) as val FROM readings 
+        SELECT AVG({sensor}) as val FROM {table} 
         WHERE timestamp BETWEEN datetime(?, "-10 minutes") AND ?
     ''', (target_time, target_time)).fetchone()
     return round(row['val'], 1) if row and row['val'] else None
@@ -24,62 +35,92 @@ def index():
 @app.route('/api/live')
 def live_data():
     conn = get_db_connection()
-    row = conn.execute('SELECT * FROM readings ORDER BY timestamp DESC LIMIT 1').fetchone()
+    table = readings_table(conn, 25)
+    row = conn.execute(f'SELECT * FROM {table} ORDER BY timestamp DESC LIMIT 1').fetchone()
     
-    co2_3h = get_val_ago(conn, 'co2', 3)
-    co2_12h = get_val_ago(conn, 'co2', 12)
-    co2_24h = get_val_ago(conn, 'co2', 24)
+    co2_3h = get_val_ago(conn, 'co2', 3, table)
+    co2_12h = get_val_ago(conn, 'co2', 12, table)
+    co2_24h = get_val_ago(conn, 'co2', 24, table)
     
     data = dict(row) if row else {}
     data.update({
         "co2_3h": co2_3h,
         "co2_12h": co2_12h,
-        "co2_24h": co2_24h
+        "co2_24h": co2_24h,
+        # {"thresholds": [{"ppm": 1200, "minutes": minuty do przekroczenia albo null}], ...} z kolektora
+        "co2_forecast": forecast.load()
     })
     
     conn.close()
     return jsonify(data)
 
-@app.route('/api/history/<sensor>')
-def history_data(sensor):
-    allowed = ['temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq']
-    if sensor not in allowed: return jsonify([])
-    
-    start_time = (datetime.now() - timedelta(hours=24)).strftime('%Y-%m-%d %H:%M:%S')
-    
-    conn = get_db_connection()
+HISTORY_SENSORS = ['temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq']
 
+def history_rows(conn, sensors, since=None):
+    """Średnie 15-minutowe z ostatnich 24 h dla kilku kolumn naraz - jeden przebieg po tabeli"""
+    start_time = (datetime.now() - timedelta(hours=24)).strftime('%Y-%m-%d %H:%M:%S')
+    table = readings_table(conn)
+    averages = ', '.join(f'AVG({s}) AS {s}' for s in sensors)
     query = f'''
         SELECT strftime('%Y-%m-%d %H:', timestamp) || 
         printf('%02d', (strftime('%M', timestamp) / 15) * 15) AS bucket,
-        AVG({sensor}) as val FROM readings
-        WHERE timestamp >= ?
+        {averages} FROM {table}
+        WHERE timestamp >= ? AND timestamp >= ?
         GROUP BY bucket ORDER BY bucket ASC
     '''
-    rows = conn.execute(query, (start_time,)).fetchall()
+    return conn.execute(query, (start_time, since or start_time)).fetchall()
+
+@app.route('/api/history/<sensor>')
+def history_data(sensor):
+    if sensor not in HISTORY_SENSORS: return jsonify([])
+    
+    # Kursor ?since=<bucket>: tylko ten przedział (mógł się zmienić) i nowsze
+    since = request.args.get('since')
+    
+    conn = get_db_connection()
+    rows = history_rows(conn, [sensor], since)
     conn.close()
     return jsonify([
-    {"timestamp": r["bucket"], sensor: round(r["val"], 1) if r["val"] is not None else None} 
+    {"timestamp": r["bucket"], sensor: round(r[sensor], 1) if r[sensor] is not None else None} 
     for r in rows
     ])
 
+@app.route('/api/history')
+def history_batch():
+    # ?sensors=co2,temp,hum[&since=<bucket>] -> wspólna tablica czasu i po jednej tablicy na czujnik
+    sensors = [s for s in request.args.get('sensors', '').split(',') if s]
+    unknown = [s for s in sensors if s not in HISTORY_SENSORS]
+    if not sensors or unknown:
+        return jsonify({"error": f"sensors: lista z {', '.join(HISTORY_SENSORS)}"}), 400
+    sensors = list(dict.fromkeys(sensors))
+
+    conn = get_db_connection()
+    rows = history_rows(conn, sensors, request.args.get('since'))
+    conn.close()
+    data = {"timestamp": [r["bucket"] for r in rows]}
+    for s in sensors:
+        data[s] = [round(r[s], 1) if r[s] is not None else None for r in rows]
+    return jsonify(data)
+
 @app.route('/api/prediction')
 def api_prediction():
     try:
+        since = request.args.get('since', '')
         conn = get_db_connection()
-        # Grupowanie wyników co 15 minut
-        rows = conn.execute('''
+        table = readings_table(conn)
+        # Grupowanie wyników co 15 minut (etykieta = początek przedziału, jak w /api/history)
+        rows = conn.execute(f'''
             SELECT 
-                strftime('%Y-%m-%d %H:%M', timestamp) as t,
+                strftime('%Y-%m-%d %H:', timestamp) ||
+                printf('%02d', (strftime('%M', timestamp) / 15) * 15) as t,
                 AVG(co2) as actual,
                 AVG(pred_co2) as pred
-            FROM readings 
+            FROM {table} 
             WHERE timestamp >= datetime('now', 'localtime', '-24 hours')
-            GROUP BY 
-                strftime('%Y-%m-%d %H', timestamp), 
-                CAST(strftime('%M', timestamp) AS INTEGER) / 15
-            ORDER BY timestamp ASC
-        ''').fetchall()
+              AND timestamp >= ?
+            GROUP BY t
+            ORDER BY t ASC
+        ''', (since,)).fetchall()
         conn.close()
 
         # Filtrowanie pustych wartości i zaokrąglanie do 1 miejsca po przecinku
@@ -97,5 +138,48 @@ def api_prediction():
         print(f"Błąd /api/prediction: {e}")
         return jsonify([])
 
+@app.route('/api/stats')
+def api_stats():
+    # Statystyki ze szkiców zapisywanych przez kolektor - bez skanowania tabeli readings
+    metric = request.args.get('metric', 'co2')
+    if metric not in stats_sketch.METRICS:
+        return jsonify({"error": f"nieznana wielkość {metric}"}), 400
+    group = request.args.get('group', 'day')
+    if group not in ('hour', 'day', 'total'):
+        return jsonify({"error": "group: hour, day albo total"}), 400
+    try:
+        quantiles = [float(q) for q in request.args.get('q', '0.5,0.95').split(',')]
+        date_from = request.args.get('from') or (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
+        date_to = request.args.get('to') or datetime.now().strftime('%Y-%m-%d')
+        date_to = stats_sketch.next_day(date_to[:10])  # 'to' włącznie
+    except ValueError as e:
+        return jsonify({"error": f"nieprawidłowe parametry: {e}"}), 400
+    if not all(0 <= q <= 1 for q in quantiles):
+        return jsonify({"error": "kwantyle z zakresu 0-1"}), 400
+
+    conn = get_db_connection()
+    try:
+        groups = stats_sketch.query(conn, metric, date_from, date_to, group)
+    except sqlite3.OperationalError:
+        groups = {}  # brak tabeli stats (kolektor jeszcze nic nie zapisał)
+    conn.close()
+    return jsonify([{"period": key, **stats_sketch.summary(sketch, quantiles)}
+                    for key, sketch in groups.items()])
+
+@app.route('/api/ingest', methods=['POST'])
+def api_ingest():
+    # Serwer centralny: paczki pomiarów z innych stacji (uplink.py)
+    if uplink.INGEST_TOKEN and request.headers.get('X-Ingest-Token') != uplink.INGEST_TOKEN:
+        return jsonify({"error": "brak autoryzacji"}), 403
+    try:
+        payload = uplink.decode_batch(request.get_data(), request.headers.get('Content-Encoding'))
+    except Exception as e:
+        return jsonify({"error": f"nieprawidłowa paczka: {e}"}), 400
+
+    conn = get_db_connection()
+    received = uplink.store_batch(conn, payload)
+    conn.close()
+    return jsonify({"station_id": payload['station_id'], "received": received})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
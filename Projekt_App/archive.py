@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import zlib
+import struct
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import partitions
+
+# Archiwum zamkniętych dni: jeden plik na dzień, osobny blok zlib na kolumnę.
+#   MAGIC (4 B) | długość nagłówka (uint32) | nagłówek JSON | bloki kolumn
+# Czas: sekundy od północy (czas lokalny, jak w bazie), kodowane różnicowo (int32).
+# Wartości: liczby całkowite po przemnożeniu przez SCALES (kwantyzacja), kodowane różnicowo,
+# braki (NULL) w osobnej masce bitowej.
+MAGIC = b'ARC1'
+PREFIX = struct.Struct('<4sI')
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')  # względem katalogu sensors.db
+LEVEL = 9
+KEEP_DAYS = 2  # build --delete bez --until zostawia w bazie tyle ostatnich dni (24 h w app.py, uplink)
+
+# Mnożniki kwantyzacji - zgodne z dokładnością zapisu w bazie
+SCALES = {
+    'temp': 10, 'hum': 10, 'co2': 1,
+    'pm10': 1, 'pm25': 1, 'pm100': 1,
+    'voc': 1, 'iaq': 1, 'pred_co2': 10, 'iaq_version': 1,
+}
+COLUMNS = list(SCALES)
+
+
+def archive_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIR)
+
+
+def day_path(db_path, day):
+    return os.path.join(archive_dir(db_path), f'{day}.arc')
+
+
+def archived_days(db_path):
+    path = archive_dir(db_path)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name[:-4] for name in os.listdir(path) if name.endswith('.arc'))
+
+
+def encode_column(values, scale):
+    """float64 z NaN -> (maska braków, różnice wartości po kwantyzacji) skompresowane zlib"""
+    missing = np.isnan(values)
+    q = np.round(np.where(missing, 0, values) * scale).astype(np.int64)
+    # Brak = poprzednia wartość, żeby różnice pozostały małe
+    if missing.any():
+        idx = np.where(missing, 0, np.arange(len(q)))
+        np.maximum.accumulate(idx, out=idx)
+        q = q[idx]
+    delta = np.diff(q, prepend=0).astype('<i4')
+    return zlib.compress(np.packbits(missing).tobytes() + delta.tobytes(), LEVEL)
+
+
+def decode_column(block, count, scale):
+    raw = zlib.decompress(block)
+    mask_len = (count + 7) // 8
+    missing = np.unpackbits(np.frombuffer(raw, np.uint8, mask_len), count=count).astype(bool)
+    values = np.cumsum(np.frombuffer(raw, '<i4', count, mask_len), dtype=np.int64) / scale
+    values[missing] = np.nan
+    return values
+
+
+def write_day(path, day, timestamps, columns):
+    """timestamps - datetime64[s] z jednego dnia, columns - słownik tablic float64"""
+    offsets = (timestamps - np.datetime64(day, 's')).astype(np.int64)
+    blocks = [('timestamp', zlib.compress(np.diff(offsets, prepend=0).astype('<i4').tobytes(), LEVEL))]
+    blocks += [(name, encode_column(columns[name], SCALES[name])) for name in COLUMNS]
+
+    header = {'day': day, 'count': len(offsets), 'columns': {}}
+    pos = 0
+    for name, block in blocks:
+        header['columns'][name] = [pos, len(block)]
+        pos += len(block)
+    header_bytes = json.dumps(header).encode()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, len(header_bytes)) + header_bytes)
+        for _, block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def day_count(path):
+    """Liczba wierszy w pliku dnia (z samego nagłówka)"""
+    with open(path, 'rb') as f:
+        magic, length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: to nie jest plik archiwum")
+        return json.loads(f.read(length))['count']
+
+
+def read_day(path, columns=None):
+    """Dekompresja tylko wybranych kolumn jednego dnia -> słownik tablic NumPy (z 'timestamp')"""
+    with open(path, 'rb') as f:
+        magic, length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: to nie jest plik archiwum")
+        header = json.loads(f.read(length))
+        base = PREFIX.size + length
+        count = header['count']
+
+        def block(name):
+            offset, size = header['columns'][name]
+            f.seek(base + offset)
+            return f.read(size)
+
+        offsets = np.cumsum(np.frombuffer(zlib.decompress(block('timestamp')), '<i4'), dtype=np.int64)
+        out = {'timestamp': np.datetime64(header['day'], 's') + offsets.astype('timedelta64[s]')}
+        for name in columns or COLUMNS:
+            out[name] = decode_column(block(name), count, SCALES[name])
+    return out
+
+
+def read(db_path, date_from, date_to, columns=None):
+    """Kolumny z dni [date_from, date_to] (RRRR-MM-DD) połączone w jedne tablice"""
+    days = [d for d in archived_days(db_path) if date_from <= d <= date_to]
+    parts = [read_day(day_path(db_path, d), columns) for d in days]
+    names = ['timestamp'] + list(columns or COLUMNS)
+    if not parts:
+        return {name: np.empty(0) for name in names}
+    return {name: np.concatenate([p[name] for p in parts]) for name in names}
+
+
+def to_frame(data):
+    """Słownik z read() -> DataFrame jak wynik zapytania do tabeli readings"""
+    import pandas as pd
+    return pd.DataFrame(data)
+
+
+def load_leading(db_path, date_from, date_to, columns):
+    """Ciągły zakres zarchiwizowanych dni od date_from (wiersze > date_from i <= date_to)
+
+    Zwraca (DataFrame z czasem jako tekst jak w bazie, nowy początek zakresu dla zapytania do bazy).
+    """
+    import pandas as pd
+
+    days = set(archived_days(db_path))
+    if not date_from or date_from[:10] not in days:
+        return pd.DataFrame(), date_from
+
+    day = datetime.strptime(date_from[:10], '%Y-%m-%d')
+    while day.strftime('%Y-%m-%d') in days and (not date_to or day.strftime('%Y-%m-%d') <= date_to[:10]):
+        day += timedelta(days=1)
+    last = (day - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    df = to_frame(read(db_path, date_from[:10], last, columns))
+    df = df[df['timestamp'] > pd.Timestamp(date_from)]
+    if date_to:
+        df = df[df['timestamp'] <= pd.Timestamp(date_to)]
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    # Wiersze z bazy dopiero od pierwszego niezarchiwizowanego dnia
+    return df, max(date_from, day.strftime('%Y-%m-%d'))
+
+
+def months_to_archive(conn, db_path, until):
+    """Miesiące z pomiarami przed `until`: partycje (bez otwierania plików) i miesiące z main.readings"""
+    months = set(partitions.list_months(db_path)) if partitions.PARTITIONED else set()
+    months.update(partitions.month_of(row[0]) for row in conn.execute(
+        'SELECT DISTINCT substr(timestamp, 1, 7) FROM main.readings WHERE timestamp < ?', (until,)))
+    return sorted(m for m in months if m <= partitions.month_of(until))
+
+
+def build(db_path='sensors.db', until=None, delete=False):
+    """Archiwizuje zamknięte dni (przed `until`), których jeszcze nie ma w archiwum
+
+    Domyślnie `until` to dziś, a z `delete` - dziś minus KEEP_DAYS, żeby ostatnie dni zostały
+    w bazie dla czytelników tabeli readings. Z `delete` usuwane są też dni zarchiwizowane
+    wcześniej bez usuwania. Miesiące są przetwarzane po kolei - dołączona jest najwyżej jedna
+    partycja naraz.
+    """
+    if until is None:
+        until = (datetime.now() - timedelta(days=KEEP_DAYS if delete else 0)).strftime('%Y-%m-%d')
+    os.makedirs(archive_dir(db_path), exist_ok=True)
+    done = set(archived_days(db_path))
+
+    conn = sqlite3.connect(db_path)
+    for month in months_to_archive(conn, db_path, until):
+        first_day = month.replace('_', '-') + '-01'
+        table = partitions.attach_range(conn, db_path, first_day, first_day)
+        days = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT substr(timestamp, 1, 10) FROM {table} '
+            f'WHERE substr(timestamp, 1, 7) = ? AND timestamp < ? ORDER BY 1',
+            (first_day[:7], until)).fetchall()]
+
+        for day in days:
+            if day not in done:
+                archive_day(conn, db_path, table, day, delete)
+            elif delete:
+                delete_archived(conn, db_path, table, day)
+
+        if partitions.PARTITIONED:
+            conn.execute('DROP VIEW IF EXISTS temp.readings_range')
+            if f'p_{month}' in partitions._attached(conn):
+                conn.execute(f'DETACH DATABASE p_{month}')
+
+    conn.close()
+
+
+def archive_day(conn, db_path, table, day, delete=False):
+    next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    rows = conn.execute(f'''SELECT timestamp, {", ".join(COLUMNS)} FROM {table}
+                            WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp''',
+                        (day, next_day)).fetchall()
+    timestamps = np.array([r[0] for r in rows], dtype='datetime64[s]')
+    cols = np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(COLUMNS))
+    path = day_path(db_path, day)
+    write_day(path, day, timestamps, {name: cols[:, i] for i, name in enumerate(COLUMNS)})
+
+    # Kontrola przed ewentualnym usunięciem z bazy
+    check = read_day(path, ['co2'])
+    if len(check['timestamp']) != len(rows):
+        raise IOError(f"{path}: niezgodna liczba wierszy")
+    print(f"{day}: {len(rows)} wierszy -> {os.path.getsize(path) / 1024:.0f} KB")
+
+    if delete:
+        delete_day(conn, db_path, day, next_day)
+
+
+def delete_archived(conn, db_path, table, day):
+    """Usuwa z bazy dzień zarchiwizowany wcześniej (np. przez build bez --delete)
+
+    Gdy w bazie jest inna liczba wierszy niż w archiwum (dopisane później), dzień jest
+    archiwizowany ponownie, a dopiero potem usuwany.
+    """
+    next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    count = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE timestamp >= ? AND timestamp < ?',
+                         (day, next_day)).fetchone()[0]
+    if count != day_count(day_path(db_path, day)):
+        archive_day(conn, db_path, table, day, delete=True)
+        return
+    delete_day(conn, db_path, day, next_day)
+    print(f"{day}: {count} wierszy usuniętych z bazy (już w archiwum)")
+
+
+def delete_day(conn, db_path, day, next_day):
+    """Usuwa zarchiwizowany dzień z tabeli (albo z partycji miesiąca)"""
+    schema = f'p_{partitions.month_of(day)}' if partitions.PARTITIONED else 'main'
+    with conn:
+        if partitions.PARTITIONED:
+            conn.execute('DELETE FROM main.readings WHERE timestamp >= ? AND timestamp < ?', (day, next_day))
+        conn.execute(f'DELETE FROM {schema}.readings WHERE timestamp >= ? AND timestamp < ?', (day, next_day))
+
+
+def scan(db_path, date_from, date_to, column):
+    """Porównanie czasu odczytu jednej kolumny z zakresu: archiwum vs SQLite"""
+    start = time.perf_counter()
+    data = read(db_path, date_from, date_to, [column])
+    arc_s = time.perf_counter() - start
+
+    to = (datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    table = partitions.attach_range(conn, db_path, date_from, to)
+    rows = conn.execute(f'SELECT timestamp, {column} FROM {table} WHERE timestamp >= ? AND timestamp < ?',
+                        (date_from, to)).fetchall()
+    conn.close()
+    sql_s = time.perf_counter() - start
+
+    size = sum(os.path.getsize(day_path(db_path, d)) for d in archived_days(db_path) if date_from <= d <= date_to)
+    print(f"Archiwum: {len(data['timestamp'])} wierszy w {arc_s * 1000:.0f} ms ({size / 1024:.0f} KB na dysku)")
+    print(f"SQLite:   {len(rows)} wierszy w {sql_s * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Skompresowane archiwum kolumnowe zamkniętych dni")
+    parser.add_argument('--db', default='sensors.db')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('build', help="archiwizacja zamkniętych dni")
+    p.add_argument('--until', help=f"archiwizuj dni przed RRRR-MM-DD (domyślnie dziś, "
+                                   f"z --delete dziś minus {KEEP_DAYS} dni)")
+    p.add_argument('--delete', action='store_true', help="usuń zarchiwizowane dni z bazy")
+
+    sub.add_parser('list', help="zarchiwizowane dni i rozmiary")
+
+    p = sub.add_parser('scan', help="porównanie odczytu zakresu: archiwum vs SQLite")
+    p.add_argument('date_from')
+    p.add_argument('date_to')
+    p.add_argument('--column', default='co2', choices=COLUMNS)
+
+    args = parser.parse_args()
+    if args.cmd == 'build':
+        build(args.db, args.until, args.delete)
+    elif args.cmd == 'list':
+        for day in archived_days(args.db):
+            print(f"{day}: {os.path.getsize(day_path(args.db, day)) / 1024:.0f} KB")
+    else:
+        scan(args.db, args.date_from, args.date_to, args.column)
@@ -0,0 +1,170 @@
+import time
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+import partitions
+import archive
+from predictor import MODEL_PATH, COMPACT_MODEL_PATH, FEATURES, build_features
+
+# Horyzonty oceny predykcji (min); model jest trenowany na 15 min
+HORIZONS = [5, 10, 15, 20, 30]
+MODEL_HORIZON = 15
+TOLERANCE_S = 30      # maks. odstęp pomiaru od chwili t + horyzont
+CHUNK = 10000         # wierszy na jedno wywołanie predict
+
+
+def load_readings(db_path, date_from, date_to):
+    """Surowe pomiary co 10 s (tak jak widział je kolektor) w kolejności czasu
+
+    Początkowe dni zakresu zarchiwizowane przez archive.py są czytane z archiwum, reszta z bazy.
+    """
+    archived, date_from = archive.load_leading(db_path, date_from, date_to, ['co2', 'temp', 'hum', 'pred_co2'])
+    conn = sqlite3.connect(db_path)
+    table = partitions.attach_range(conn, db_path, date_from, date_to)
+    df = pd.read_sql_query(f'''SELECT timestamp, co2, temp, hum, pred_co2 FROM {table}
+                              WHERE timestamp > ? AND timestamp <= ? ORDER BY timestamp''',
+                           conn, params=(date_from, date_to))
+    conn.close()
+    if len(archived):
+        df = pd.concat([archived, df], ignore_index=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def replay_features(df):
+    """Cechy wiersz po wierszu jak w pętli kolektora: trend względem poprzedniego surowego pomiaru
+
+    Zwraca (indeksy wierszy z kompletnym wejściem, macierz cech).
+    """
+    rows, idx = [], []
+    last_co2 = None
+    for i, (ts, co2, temp, hum) in enumerate(zip(df['timestamp'], df['co2'], df['temp'], df['hum'])):
+        co2 = None if pd.isna(co2) else co2
+        if co2 is not None and not pd.isna(temp) and not pd.isna(hum):
+            trend = co2 - last_co2 if last_co2 else 0
+            rows.append(build_features(co2, temp, hum, ts.to_pydatetime(), trend))
+            idx.append(i)
+        # Bufor kolektora dostaje każdy zapisany pomiar, także zamaskowany (None)
+        last_co2 = co2
+    return np.array(idx, dtype=np.int64), np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+
+
+def load_model(path, compact):
+    if compact:
+        from compact_model import CompactForest
+        return CompactForest.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+def predict_batch(model, X, compact, chunk=CHUNK):
+    """Predykcja paczkami; zaokrąglenie jak w Predictor.predict"""
+    out = np.empty(len(X))
+    for start in range(0, len(X), chunk):
+        part = X[start:start + chunk]
+        if compact:
+            out[start:start + chunk] = model.predict(part.tolist())
+        else:
+            out[start:start + chunk] = model.predict(pd.DataFrame(part, columns=FEATURES))
+    return np.round(out, 1)
+
+
+def future_values(ts, values, minutes):
+    """Wartość zmierzona najbliżej chwili t + minutes (NaN, gdy brak pomiaru w tolerancji)"""
+    target = ts + np.int64(minutes * 60)
+    pos = np.clip(np.searchsorted(ts, target), 1, len(ts) - 1)
+    # Bliższy z dwóch sąsiednich pomiarów
+    pos = np.where(np.abs(ts[pos - 1] - target) < np.abs(ts[pos] - target), pos - 1, pos)
+    result = values[pos].astype(float)
+    result[np.abs(ts[pos] - target) > TOLERANCE_S] = np.nan
+    return result
+
+
+def error_stats(pred, actual):
+    mask = ~np.isnan(pred) & ~np.isnan(actual)
+    err = pred[mask] - actual[mask]
+    if not len(err):
+        return {'n': 0, 'MAE': None, 'RMSE': None, 'bias': None}
+    return {
+        'n': int(mask.sum()),
+        'MAE': round(float(np.mean(np.abs(err))), 2),
+        'RMSE': round(float(np.sqrt(np.mean(err ** 2))), 2),
+        'bias': round(float(np.mean(err)), 2),
+    }
+
+
+def run(db_path, model_path, compact, date_from, date_to, output=None):
+    df = load_readings(db_path, date_from, date_to)
+    if len(df) < 2:
+        print(f"Za mało pomiarów w zakresie {date_from} - {date_to}.")
+        return None
+
+    start = time.perf_counter()
+    model = load_model(model_path, compact)
+    idx, X = replay_features(df)
+    pred = predict_batch(model, X, compact)
+    elapsed = time.perf_counter() - start
+
+    all_ts = df['timestamp'].values.astype('datetime64[s]').astype(np.int64)
+    co2 = df['co2'].to_numpy(dtype=float)
+    span_s = all_ts[-1] - all_ts[0]
+    print(f"Odtworzono {len(idx)} predykcji ({date_from} - {date_to}) w {elapsed:.1f} s "
+          f"({span_s / max(elapsed, 1e-9):.0f}x szybciej niż w czasie rzeczywistym)")
+
+    # Błąd względem horyzontów: model, wartość bieżąca (persystencja), zapisane pred_co2
+    logged = df['pred_co2'].to_numpy(dtype=float)[idx]
+    current = co2[idx]
+    rows = []
+    for minutes in HORIZONS:
+        actual = future_values(all_ts, co2, minutes)[idx]
+        for name, values in (('model', pred), ('persystencja', current), ('zapisane pred_co2', logged)):
+            rows.append({'horyzont_min': minutes, 'predykcja': name, **error_stats(values, actual)})
+    by_horizon = pd.DataFrame(rows)
+
+    # Błąd modelu na horyzoncie treningowym według godziny doby
+    actual = future_values(all_ts, co2, MODEL_HORIZON)[idx]
+    hours = df['timestamp'].dt.hour.to_numpy()[idx]
+    by_hour = pd.DataFrame([{'godzina': h, **error_stats(pred[hours == h], actual[hours == h])}
+                            for h in np.unique(hours)])
+
+    print("\n" + "=" * 70)
+    print("BŁĄD WEDŁUG HORYZONTU:")
+    print("=" * 70)
+    print(by_horizon.to_string(index=False))
+    print("\n" + "=" * 70)
+    print(f"BŁĄD MODELU ({MODEL_HORIZON} min) WEDŁUG GODZINY:")
+    print("=" * 70)
+    print(by_hour.to_string(index=False))
+    print("=" * 70 + "\n")
+
+    if output:
+        detail = pd.DataFrame({
+            'timestamp': df['timestamp'].iloc[idx].dt.strftime('%Y-%m-%d %H:%M:%S').values,
+            'co2': current,
+            'pred': pred,
+            'pred_co2_zapisane': logged,
+            f'co2_za_{MODEL_HORIZON}min': actual,
+        })
+        detail.to_csv(output, index=False)
+        print(f"Predykcje zapisane do {output}")
+    return by_horizon, by_hour
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Odtworzenie historii pomiarów przez ścieżkę predykcji kolektora")
+    parser.add_argument('--db', default='sensors.db')
+    parser.add_argument('--model', help="plik modelu (domyślnie jak w kolektorze)")
+    parser.add_argument('--compact', action='store_true', help="model .cfr (tryb LOW_MEMORY)")
+    parser.add_argument('--end', help="koniec zakresu RRRR-MM-DD (domyślnie dziś)")
+    parser.add_argument('--days', type=int, default=7, help="długość zakresu w dniach")
+    parser.add_argument('--output', help="CSV z predykcjami wiersz po wierszu")
+    args = parser.parse_args()
+
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+    date_from = (end_date - timedelta(days=args.days)).strftime('%Y-%m-%d')
+    date_to = end_date.strftime('%Y-%m-%d 23:59:59')
+    model_path = args.model or (COMPACT_MODEL_PATH if args.compact else MODEL_PATH)
+    run(args.db, model_path, args.compact, date_from, date_to, args.output)
@@ -0,0 +1,167 @@
+import os
+import time
+import argparse
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import joblib
+from datetime import datetime, timedelta
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from train_model import load_data, prepare_features
+from memory import rss_mb
+
+# Modele z notatnika Test_modeli/Porownanie_modeli.ipynb (ze skalowaniem cech jak w notatniku)
+MODELS = {
+    "Regresja Liniowa": lambda: LinearRegression(),
+    "KNN": lambda: KNeighborsRegressor(n_neighbors=5),
+    "Random Forest": lambda: RandomForestRegressor(n_estimators=100, random_state=42),
+    "Gradient Boosting": lambda: GradientBoostingRegressor(n_estimators=100, random_state=42),
+}
+
+LATENCY_REPEATS = 200
+
+
+class PeakRss:
+    """Próbkuje RSS w tle i zapamiętuje maksymalny przyrost względem startu (MB)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+    def __enter__(self):
+        self.base = self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+    @property
+    def delta(self):
+        return self.peak - self.base
+
+
+def single_row_latency(model, X):
+    """Mediana czasu predykcji jednego wiersza DataFrame (tak jak w kolektorze), w ms"""
+    row = X.iloc[[-1]]
+    times = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def model_size_kb(model):
+    with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as f:
+        path = f.name
+    try:
+        joblib.dump(model, path)
+        return os.path.getsize(path) / 1024
+    finally:
+        os.remove(path)
+
+
+def benchmark_model(name, factory, X, y, splits):
+    """Walidacja krzyżowa szeregu czasowego + pomiary kosztu modelu z ostatniego foldu
+
+    peak_mem_mb to maksymalny przyrost RSS procesu w trakcie treningu.
+    """
+    maes, rmses, r2s, fit_times = [], [], [], []
+    peak_mb = 0.0
+
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=splits).split(X):
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+        model = make_pipeline(StandardScaler(), factory())
+
+        with PeakRss() as mem:
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_times.append(time.perf_counter() - start)
+        peak_mb = max(peak_mb, mem.delta)
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        batch_ms_per_row = (time.perf_counter() - start) * 1000 / len(X_test)
+
+        maes.append(mean_absolute_error(y_test, y_pred))
+        rmses.append(np.sqrt(mean_squared_error(y_test, y_pred)))
+        r2s.append(r2_score(y_test, y_pred))
+
+    return {
+        'Model': name,
+        'MAE': round(np.mean(maes), 2),
+        'RMSE': round(np.mean(rmses), 2),
+        'RMSE_std': round(np.std(rmses), 2),
+        'R2': round(np.mean(r2s), 4),
+        'train_s': round(np.mean(fit_times), 3),
+        'predict_1_ms': round(single_row_latency(model, X_test), 3),
+        'predict_batch_ms_per_row': round(batch_ms_per_row, 4),
+        'size_kb': round(model_size_kb(model), 1),
+        'peak_mem_mb': round(peak_mb, 1),
+    }
+
+
+def run(db_path, date_from, date_to, splits, output, models):
+    df = load_data(db_path, date_from, date_to)
+    if len(df) < 100:
+        print(f"Zbyt mało danych do porównania modeli. Znaleziono tylko {len(df)} rekordów.")
+        return None
+
+    X, y = prepare_features(df)
+    print(f"Dane: {date_from} - {date_to} | próbki po przygotowaniu: {len(X)} | foldy: {splits}")
+
+    results = []
+    for name in models:
+        print(f"Trenowanie: {name}...")
+        results.append(benchmark_model(name, MODELS[name], X, y, splits))
+
+    results_df = pd.DataFrame(results).sort_values(by='RMSE')
+    results_df.insert(0, 'timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    results_df.insert(1, 'db', db_path)
+    results_df.insert(2, 'date_from', date_from)
+    results_df.insert(3, 'date_to', date_to)
+    results_df.insert(4, 'samples', len(X))
+
+    print("\n" + "=" * 70)
+    print("WYNIKI PORÓWNANIA MODELI (TimeSeriesSplit):")
+    print("=" * 70)
+    print(results_df.drop(columns=['timestamp', 'db', 'date_from', 'date_to', 'samples']).to_string(index=False))
+    print("=" * 70 + "\n")
+
+    file_exists = os.path.exists(output)
+    results_df.to_csv(output, mode='a', header=not file_exists, index=False)
+    print(f"Wyniki dopisane do {output}")
+    return results_df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Porównanie modeli predykcji CO2 (dokładność i koszt)")
+    parser.add_argument('--db', default='sensors.db')
+    parser.add_argument('--end', help="koniec zakresu RRRR-MM-DD (domyślnie dziś)")
+    parser.add_argument('--days', type=int, default=14, help="długość zakresu w dniach")
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--output', default='benchmark_results.csv')
+    args = parser.parse_args()
+
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+    date_from = (end_date - timedelta(days=args.days)).strftime('%Y-%m-%d')
+    date_to = end_date.strftime('%Y-%m-%d 23:59:59')
+    run(args.db, date_from, date_to, args.splits, args.output, args.models)
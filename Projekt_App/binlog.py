@@ -0,0 +1,173 @@
+import os
+import json
+import mmap
+import struct
+import sqlite3
+import argparse
+from datetime import datetime
+
+# Format pliku:
+#   MAGIC (4 B) | długość nagłówka (uint32) | nagłówek JSON (kolumny) | rekordy stałej długości
+# Rekord: ts jako float64 (sekundy epoch), pozostałe kolumny float32, little-endian, bez wyrównania.
+MAGIC = b'BLG1'
+PREFIX = struct.Struct('<4sI')
+NAN = float('nan')
+
+# Schemat zgodny z tabelą readings
+READINGS_COLUMNS = ['temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq', 'pred_co2']
+
+# Schemat surowych ramek PMS5003 (stężenia standardowe i atmosferyczne + liczniki cząstek)
+PMS_COLUMNS = ['pm1', 'pm25', 'pm10', 'pm1_atm', 'pm25_atm', 'pm10_atm',
+               'gt03', 'gt05', 'gt10', 'gt25', 'gt50', 'gt100']
+
+
+def record_format(columns):
+    return '<d' + 'f' * len(columns)
+
+
+class BinLogWriter:
+    """Dopisywanie rekordów do pliku binarnego (plik otwarty przez cały czas pracy)"""
+
+    def __init__(self, path, columns, flush_every=60):
+        self.path = path
+        self.columns = list(columns)
+        self.record = struct.Struct(record_format(self.columns))
+        self.flush_every = flush_every
+        self.pending = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing = read_header(path)[0]
+            if existing != self.columns:
+                raise ValueError(f"{path}: inne kolumny w pliku ({existing})")
+            self.file = open(path, 'ab')
+            self._truncate_partial()
+        else:
+            self.file = open(path, 'ab')
+            header = json.dumps({'columns': self.columns, 'created': datetime.now().isoformat()}).encode()
+            self.file.write(PREFIX.pack(MAGIC, len(header)) + header)
+            self.file.flush()
+
+    def _truncate_partial(self):
+        """Obcina niedokończony rekord (np. po zaniku zasilania w trakcie zapisu)"""
+        _, header_len = read_header(self.path)
+        body = os.path.getsize(self.path) - header_len
+        extra = body % self.record.size
+        if extra:
+            self.file.truncate(os.path.getsize(self.path) - extra)
+
+    def append(self, ts, values):
+        """ts - sekundy epoch, values - wartości w kolejności kolumn (None -> NaN)"""
+        self.file.write(self.record.pack(ts, *[NAN if v is None else v for v in values]))
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_header(path):
+    """Zwraca (kolumny, długość nagłówka w bajtach)"""
+    with open(path, 'rb') as f:
+        magic, length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: to nie jest plik binlog")
+        header = json.loads(f.read(length))
+    return header['columns'], PREFIX.size + length
+
+
+def read(path):
+    """Mapuje plik w pamięci i zwraca słownik kolumn NumPy (widoki bez kopiowania)"""
+    import numpy as np
+
+    columns, header_len = read_header(path)
+    dtype = np.dtype([('ts', '<f8')] + [(name, '<f4') for name in columns])
+
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    count = (len(mm) - header_len) // dtype.itemsize
+    records = np.frombuffer(mm, dtype=dtype, count=count, offset=header_len)
+    return {name: records[name] for name in dtype.names}
+
+
+def to_sqlite(path, db_path='sensors.db', chunk=10000):
+    """Import pliku ze schematem readings do tabeli readings"""
+    columns, _ = read_header(path)
+    if columns != READINGS_COLUMNS:
+        raise ValueError(f"{path}: schemat inny niż readings")
+
+    data = read(path)
+    conn = sqlite3.connect(db_path)
+    total = len(data['ts'])
+    for start in range(0, total, chunk):
+        part = slice(start, start + chunk)
+        cols = [data['ts'][part].tolist()] + [data[name][part].tolist() for name in columns]
+        rows = [
+            (datetime.fromtimestamp(row[0]).strftime('%Y-%m-%d %H:%M:%S'),
+             *[None if v != v else round(v, 3) for v in row[1:]])  # float32 -> bez szumu w ostatnich cyfrach
+            for row in zip(*cols)
+        ]
+        with conn:
+            conn.executemany(f'''INSERT INTO readings (timestamp, {", ".join(columns)})
+                                 VALUES ({", ".join("?" * (len(columns) + 1))})''', rows)
+    conn.close()
+    print(f"Zaimportowano {total} rekordów z {path}")
+    return total
+
+
+def from_sqlite(path, db_path='sensors.db', since=None, until=None):
+    """Eksport tabeli readings (opcjonalnie zakres czasu) do pliku binlog"""
+    conn = sqlite3.connect(db_path)
+    query = f'SELECT timestamp, {", ".join(READINGS_COLUMNS)} FROM readings WHERE 1=1'
+    params = []
+    if since:
+        query += ' AND timestamp >= ?'
+        params.append(since)
+    if until:
+        query += ' AND timestamp < ?'
+        params.append(until)
+
+    writer = BinLogWriter(path, READINGS_COLUMNS, flush_every=10000)
+    count = 0
+    for row in conn.execute(query + ' ORDER BY timestamp', params):
+        ts = datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S').timestamp()
+        writer.append(ts, row[1:])
+        count += 1
+    writer.close()
+    conn.close()
+    print(f"Wyeksportowano {count} wierszy do {path}")
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Binarny log pomiarów")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('info', help="nagłówek i liczba rekordów")
+    p.add_argument('path')
+
+    p = sub.add_parser('import', help="binlog -> tabela readings")
+    p.add_argument('path')
+    p.add_argument('--db', default='sensors.db')
+
+    p = sub.add_parser('export', help="tabela readings -> binlog")
+    p.add_argument('path')
+    p.add_argument('--db', default='sensors.db')
+    p.add_argument('--since')
+    p.add_argument('--until')
+
+    args = parser.parse_args()
+    if args.cmd == 'info':
+        columns, header_len = read_header(args.path)
+        size = struct.calcsize(record_format(columns))
+        count = (os.path.getsize(args.path) - header_len) // size
+        print(f"Kolumny: {', '.join(columns)}\nRekord: {size} B\nRekordów: {count}")
+    elif args.cmd == 'import':
+        to_sqlite(args.path, args.db)
+    else:
+        from_sqlite(args.path, args.db, args.since, args.until)
@@ -1,53 +1,98 @@
-import sqlite3
 import time
+START_TIME = time.monotonic()
+
+import os
+import sys
+import signal
+import sqlite3
 import threading
-import board
-import adafruit_sgp40
-import adafruit_sht4x
-import adafruit_scd4x
-import joblib
-import pandas as pd
+import multiprocessing
 from datetime import datetime
 from pms5003 import PMS5003
+from predictor import Predictor
+from ring_buffer import RingBuffer, Sample
+from memory import MemoryGuard
+from anomaly import FaultDetector
+from alerts import AlertEngine
+from binlog import BinLogWriter, PMS_COLUMNS
+from iaq import calculate_iaq, ensure_version_column, IAQ_VERSION
+from uplink import Uplink, UPLINK_URL
+from shm_ring import SharedRing
+from sensor_guard import SensorGuard, BusGate, CycleTimer
+import partitions
+from stats_sketch import StatsAggregator
+from forecast import ThresholdForecast
 
 # Konfiguracja
-i2c = board.I2C()
+LOW_MEMORY = os.environ.get('LOW_MEMORY', '0') == '1'
+MEMORY_CEILING_MB = float(os.environ.get('MEMORY_CEILING_MB', '0'))  # 0 = bez limitu
+BUFFER_SIZE = 360  # ostatnia godzina przy odczycie co 10 s
+RAW_PMS_LOG = os.environ.get('RAW_PMS_LOG', '')  # np. pms_raw.bin - zapis każdej ramki PMS
+USE_RAW_I2C = os.environ.get('USE_RAW_I2C', '0') == '1'  # własny sterownik sensirion.py z CRC
+# Równoległe odczyty tylko z własnym sterownikiem: sterowniki Adafruit (Blinka) trzymają blokadę
+# magistrali przez cały czas konwersji, a ich try_lock nie jest atomowy (dwa wątki mogą wysłać
+# transakcję pod zły adres na wspólnym uchwycie)
+CONCURRENT_READS = USE_RAW_I2C and os.environ.get('CONCURRENT_READS', '1') == '1'  # 0 = po kolei (dla porównania)
+MULTIPROCESS = os.environ.get('MULTIPROCESS', '0') == '1'  # osobne procesy: pomiary / predykcja / zapis
+INTERVAL_S = 10
 
 # Czujniki I2C
-sgp = adafruit_sgp40.SGP40(i2c)
-sht = adafruit_sht4x.SHT4x(i2c)
-scd4x = adafruit_scd4x.SCD4X(i2c)
+if USE_RAW_I2C:
+    from sensirion import SensirionBus, SGP40, SHT40, SCD41
+    i2c = SensirionBus(1)
+    sgp = SGP40(i2c)
+    sht = SHT40(i2c)
+    scd4x = SCD41(i2c)
+else:
+    import board
+    import adafruit_sgp40
+    import adafruit_sht4x
+    import adafruit_scd4x
+    i2c = board.I2C()
+    sgp = adafruit_sgp40.SGP40(i2c)
+    sht = adafruit_sht4x.SHT4x(i2c)
+    scd4x = adafruit_scd4x.SCD4X(i2c)
 
 # Czujnik PMS5003
 pms5003 = PMS5003(device='/dev/ttyS0')
 
-# Zmienne dla danych PMS
-pms_latest_data = {"pm1": 0, "pm25": 0, "pm10": 0}
+# Limity czasu odczytu - zawieszony czujnik degraduje tylko swoje kolumny. Przy odczytach po kolei
+# (sterowniki Adafruit) zawieszony odczyt I2C wstrzymuje pozostałe czujniki na magistrali;
+# sensirion.py trzyma blokadę na czas każdej transakcji, więc tam odczyty mogą się nakładać.
+i2c_gate = BusGate(exclusive=not CONCURRENT_READS)
+guards = {name: SensorGuard(name, bus=i2c_gate) for name in ('sht40', 'sgp40', 'scd41')}
+guards['pms5003'] = SensorGuard('pms5003')  # UART, osobny wątek
+scd_ready_guard = SensorGuard('scd41_ready', guards['scd41'].timeout_s, bus=i2c_gate)
+# Tabela zapisu: readings albo partycja bieżącego miesiąca (PARTITIONED=1)
+partition_writer = partitions.PartitionWriter('sensors.db')
+stats_aggregator = StatsAggregator()  # szkice kwantyli dla /api/stats
+co2_forecast = ThresholdForecast()     # czas do przekroczenia progów CO2 dla /api/live
+read_timer = CycleTimer('równolegle' if CONCURRENT_READS else 'po kolei')
+
+# Ostatnie dane PMS (aktualizowane przez wątek pms_worker)
 data_lock = threading.Lock()
 
 def pms_worker():
     """Wątek czytający dane z PMS5003 w tle"""
-    global pms_latest_data
+    # Opcjonalny zapis każdej ramki PMS (ok. 1 Hz) do binarnego logu
+    raw_log = BinLogWriter(RAW_PMS_LOG, PMS_COLUMNS) if RAW_PMS_LOG else None
     while True:
         try:
             data = pms5003.read()
             with data_lock:
-                pms_latest_data["pm1"] = data.pm_ug_per_m3(1.0)
-                pms_latest_data["pm25"] = data.pm_ug_per_m3(2.5)
-                pms_latest_data["pm10"] = data.pm_ug_per_m3(10)
+                guards['pms5003'].update((data.pm_ug_per_m3(1.0), data.pm_ug_per_m3(2.5), data.pm_ug_per_m3(10)))
+            if raw_log:
+                raw_log.append(time.time(), [
+                    data.pm_ug_per_m3(1.0), data.pm_ug_per_m3(2.5), data.pm_ug_per_m3(10),
+                    data.pm_ug_per_m3(1.0, True), data.pm_ug_per_m3(2.5, True), data.pm_ug_per_m3(None, True),
+                    data.pm_per_1l_air(0.3), data.pm_per_1l_air(0.5), data.pm_per_1l_air(1.0),
+                    data.pm_per_1l_air(2.5), data.pm_per_1l_air(5.0), data.pm_per_1l_air(10.0),
+                ])
         except Exception:
             time.sleep(1)
 
-def calculate_iaq(co2, pm25, voc_index):
-    """Oblicza IAQ w skali 1-100 (100 = idealne)"""
-    safe_voc = voc_index if voc_index > 0 else 100
-    
-    score_co2 = max(0, 100 - (max(0, co2 - 400) / 16)) 
-    score_pm25 = max(0, 100 - (pm25 * 2)) 
-    score_voc = max(0, 100 - (max(0, safe_voc - 150) / 3.5))
-
-    total_iaq = (score_co2 * 0.3) + (score_pm25 * 0.4) + (score_voc * 0.3)
-    return round(total_iaq)
+def round_or_none(value, digits=1):
+    return round(value, digits) if value is not None else None
 
 def init_db():
     """Inicjalizacja bazy danych z kolumną dla predykcji"""
@@ -58,74 +103,288 @@ def init_db():
                   temp REAL, hum REAL, co2 INTEGER, 
                   pm10 REAL, pm25 REAL, pm100 REAL, 
                   voc REAL, iaq REAL, pred_co2 REAL)''')
+    # Zdarzenia z detektorów błędów czujników
+    c.execute('''CREATE TABLE IF NOT EXISTS faults
+                 (timestamp DATETIME, sensor TEXT, kind TEXT, value REAL)''')
     conn.commit()
+    ensure_version_column(conn)
     conn.close()
 
+def seed_buffer(conn, buffer):
+    """Ostatnie CO2 z bazy do trendu trzymane w pamięci (bez zapytania w każdym cyklu)"""
+    table = partitions.attach_hours(conn, 'sensors.db', 24 * 40)
+    last_row = conn.execute(f'SELECT timestamp, co2 FROM {table} ORDER BY timestamp DESC LIMIT 1').fetchone()
+    if last_row:
+        last_ts = datetime.strptime(last_row[0], '%Y-%m-%d %H:%M:%S').timestamp()
+        buffer.append(Sample(ts=last_ts, co2=last_row[1]))
+
+def read_sample(detector, buffer):
+    """Odczyt czujników, maskowanie błędów i IAQ; zwraca (Sample, błędy)"""
+    start = time.perf_counter()
+    was_degraded = {name: guard.degraded for name, guard in guards.items()}
+    if CONCURRENT_READS:
+        # 1-2. Start wszystkich czujników I2C naraz - czasy konwersji się nakładają.
+        # Kompensacja SGP40 z poprzedniego odczytu SHT40 (zmiana w ciągu 10 s jest pomijalna).
+        last = guards['sht40'].value or (25, 50)
+        guards['sht40'].start(lambda: sht.measurements)
+        guards['sgp40'].start(sgp.measure_index, *last)
+        guards['scd41'].start(lambda: scd4x.CO2)
+        th, sht_age = guards['sht40'].result()
+        voc_index, sgp_age = guards['sgp40'].result()
+        co2, scd_age = guards['scd41'].result()
+        temp, hum = th if th is not None else (None, None)
+    else:
+        # 1. Odczyt SHT40 i SGP40 (każdy czujnik z własnym limitem czasu)
+        th, sht_age = guards['sht40'].read(lambda: sht.measurements)
+        temp, hum = th if th is not None else (None, None)
+        voc_index, sgp_age = guards['sgp40'].read(sgp.measure_index,
+                                                  25 if temp is None else temp, 50 if hum is None else hum)
+
+        # 2. Odczyt SCD41
+        co2, scd_age = guards['scd41'].read(lambda: scd4x.CO2)
+    read_timer.add(time.perf_counter() - start)
+    
+    # 3. Odczyt PMS (wartość z wątku pms_worker, jeśli nie jest przeterminowana)
+    with data_lock:
+        pm, pms_age = guards['pms5003'].current()
+    pm1, pm25, pm10 = pm if pm is not None else (None, None, None)
+
+    # 4. Wykrywanie błędów czujników (błędne wartości -> None)
+    sample = Sample(ts=time.time(), temp=temp, hum=hum, co2=co2,
+                    pm10=pm1, pm25=pm25, pm100=pm10, voc=voc_index)
+    faults = detector.check(sample, buffer)
+
+    # Odczyt po terminie - jeden wpis na początku awarii (nie w każdym cyklu):
+    # ostatnia dobra wartość (wiek w s) albo NULL (bez wieku)
+    for name, age, fresh in (('sht40', sht_age, th), ('sgp40', sgp_age, voc_index),
+                             ('scd41', scd_age, co2), ('pms5003', pms_age, pm)):
+        if guards[name].degraded and not was_degraded[name]:
+            faults.append((name, 'timeout', round(age, 1) if fresh is not None else None))
+
+    # 5. Obliczanie IAQ
+    if sample.co2 is not None and sample.pm25 is not None:
+        sample.iaq = calculate_iaq(sample.co2, sample.pm25, sample.voc)
+    return sample, faults
+
+def wait_for_pms():
+    """Czeka na pierwszą ramkę PMS (co ok. 1 s), żeby pierwszy wiersz po starcie miał PM i IAQ"""
+    if not guards['pms5003'].first.wait(guards['pms5003'].timeout_s):
+        print("PMS5003 nie przysłał ramki po starcie - PM i IAQ puste do pierwszej ramki")
+
+def sensor_ready():
+    """SCD41 ma nowy pomiar; zawieszony lub brakujący czujnik nie zatrzymuje cyklu"""
+    ready, _ = scd_ready_guard.read(lambda: scd4x.data_ready)
+    return ready is not False
+
+def predict_sample(predictor, buffer, sample):
+    """Predykcja CO2 za 15 min (None przy zamaskowanym wejściu albo gdy model się ładuje)"""
+    try:
+        if None in (sample.co2, sample.temp, sample.hum):
+            raise ValueError("zamaskowane wejście modelu")
+        # Obliczanie trendu
+        last_co2 = buffer.get('co2') if len(buffer) else None
+        trend = sample.co2 - last_co2 if last_co2 else 0
+        return predictor.predict(sample.co2, sample.temp, sample.hum, datetime.fromtimestamp(sample.ts), trend)
+    except Exception:
+        return None
+
+def local_time(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+def store_sample(conn, sample, faults):
+    """Zapis CZASU LOKALNEGO i danych; faults = [(ts, czujnik, rodzaj, wartość), ...]"""
+    now_local = local_time(sample.ts)
+    table = partition_writer.table(conn, sample.ts)
+    with conn:
+        conn.execute(f'''INSERT INTO {table} 
+            (timestamp, temp, hum, co2, pm10, pm25, pm100, voc, iaq, pred_co2, iaq_version) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (now_local, round_or_none(sample.temp), round_or_none(sample.hum), sample.co2, 
+             sample.pm10, sample.pm25, sample.pm100, sample.voc, sample.iaq, sample.pred_co2, IAQ_VERSION))
+        if faults:
+            conn.executemany('INSERT INTO faults (timestamp, sensor, kind, value) VALUES (?, ?, ?, ?)',
+                             [(local_time(ts), name, kind, value) for ts, name, kind, value in faults])
+    # Statystyki są dodatkiem - ich błąd nie może zgubić próbki z bufora ani alarmów
+    try:
+        stats_aggregator.add(conn, now_local, sample)
+    except Exception as e:
+        print(f"Błąd statystyk: {e}")
+    co2_forecast.update(sample)
+    try:
+        co2_forecast.save()
+    except OSError as e:
+        print(f"Błąd zapisu prognozy: {e}")
+
+    if faults:
+        print(f"[{now_local}] Błędy czujników: " + ", ".join(f"{n}:{k}" for _, n, k, _ in faults))
+    pred_co2 = sample.pred_co2
+    print(f"[{now_local}] CO2: {sample.co2} | Pred(15m): {pred_co2 if pred_co2 else 'N/A'} | IAQ: {sample.iaq}%")
+
 def collect_data():
     init_db()
+    if MULTIPROCESS:
+        return collect_data_multiprocess()
     
     # Wątek PMS
     t_pms = threading.Thread(target=pms_worker, daemon=True)
     t_pms.start()
 
+    # Opcjonalna wysyłka pomiarów na serwer centralny (UPLINK_URL)
+    if UPLINK_URL:
+        Uplink().start()
+
     # Pomiar SCD41
     scd4x.start_periodic_measurement()
+    wait_for_pms()
     
+    # Model i biblioteki ML ładowane w tle - pomiary startują od razu
+    predictor = Predictor(compact=LOW_MEMORY)
+    predictor.start()
+
+    buffer = RingBuffer(BUFFER_SIZE)
+    memory_guard = MemoryGuard(MEMORY_CEILING_MB)
+    detector = FaultDetector()
+    alert_engine = AlertEngine()
+
     print("Stacja aktywna (Board I2C + AI Engine)")
     conn = sqlite3.connect('sensors.db', check_same_thread=False)
-    
+    seed_buffer(conn, buffer)
+    first_stored = False
+
     while True:
-        if scd4x.data_ready:
+        if sensor_ready():
             try:
-                # 1. Odczyt SHT40 i SGP40
-                temp, hum = sht.measurements
-                voc_index = sgp.measure_index(temperature=temp, relative_humidity=hum)
-
-                # 2. Odczyt SCD41
-                co2 = scd4x.CO2
-                
-                # 3. Odczyt PMS
-                with data_lock:
-                    pm1, pm25, pm10 = pms_latest_data["pm1"], pms_latest_data["pm25"], pms_latest_data["pm10"]
-
-                # 4. Obliczanie IAQ
-                iaq_val = calculate_iaq(co2, pm25, voc_index)
-
-                # 5. PREDYKCJA
-                pred_co2 = None
-                try:
-                    # Wytrenowany model
-                    model = joblib.load('co2_model.pkl')
-                    
-                    # Obliczanie trendu
-                    last_row = conn.execute('SELECT co2 FROM readings ORDER BY timestamp DESC LIMIT 1').fetchone()
-                    trend = co2 - last_row[0] if last_row and last_row[0] else 0
-                    
-                    now = datetime.now()
-                    # Cechy: co2, temp, hum, godzina, dzień_tyg, trend
-                    X_input = pd.DataFrame(
-                        [[co2, temp, hum, now.hour, now.weekday(), trend]], 
-                        columns=['co2', 'temp', 'hum', 'hour', 'day_of_week', 'co2_trend']
-                    )
-                    pred_co2 = round(model.predict(X_input)[0], 1)
-                except Exception:
-                    pred_co2 = None
-
-                # 6. Zapisywanie CZASU LOKALNEGO i danych
-                now_local = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                with conn:
-                    conn.execute('''INSERT INTO readings 
-                        (timestamp, temp, hum, co2, pm10, pm25, pm100, voc, iaq, pred_co2) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (now_local, round(temp, 1), round(hum, 1), co2, 
-                         pm1, pm25, pm10, voc_index, iaq_val, pred_co2))
-                
-                print(f"[{now_local}] CO2: {co2} | Pred(15m): {pred_co2 if pred_co2 else 'N/A'} | IAQ: {iaq_val}%")
+                sample, faults = read_sample(detector, buffer)
+
+                # 6. PREDYKCJA (None, dopóki model ładuje się w tle)
+                sample.pred_co2 = predict_sample(predictor, buffer, sample)
+
+                # 7. Zapis, bufor i alarmy
+                store_sample(conn, sample, [(sample.ts, *f) for f in faults])
+                buffer.append(sample)
+                alert_engine.process(sample)
+
+                if not first_stored:
+                    first_stored = True
+                    print(f"Pierwszy odczyt zapisany po {time.monotonic() - START_TIME:.1f} s od startu")
 
             except Exception as e:
                 print(f"Błąd pętli: {e}")
+
+            memory_guard.check()
         
-        time.sleep(10)
+        time.sleep(INTERVAL_S)
+
+def inference_process(raw, enriched):
+    """Proces predykcji: próbki z pierścienia pomiarów -> pred_co2 -> pierścień do zapisu"""
+    predictor = Predictor(compact=LOW_MEMORY)
+    predictor.start()
+    buffer = RingBuffer(BUFFER_SIZE)
+    conn = sqlite3.connect('sensors.db')
+    seed_buffer(conn, buffer)
+    conn.close()
+    memory_guard = MemoryGuard(MEMORY_CEILING_MB)
+
+    reader = raw.reader(start=0)
+    while True:
+        for sample in reader.wait():
+            sample.pred_co2 = predict_sample(predictor, buffer, sample)
+            enriched.publish(sample)
+            buffer.append(sample)
+        memory_guard.check()
+
+def storage_process(enriched, fault_queue):
+    """Proces zapisu: SQLite, alarmy i uplink - blokady bazy nie opóźniają pomiarów"""
+    conn = sqlite3.connect('sensors.db')
+    alert_engine = AlertEngine()
+    memory_guard = MemoryGuard(MEMORY_CEILING_MB)
+    if UPLINK_URL:
+        Uplink().start()
+
+    reader = enriched.reader(start=0)
+    first_stored = False
+    while True:
+        samples = reader.wait()
+        if reader.skipped:
+            print(f"Zapis nie nadąża - pominięto {reader.skipped} próbek")
+            reader.skipped = 0
+        for sample in samples:
+            # Błędy czujników przychodzą osobną kolejką i trafiają do najbliższej transakcji
+            faults = []
+            while not fault_queue.empty():
+                faults += fault_queue.get()
+            try:
+                store_sample(conn, sample, faults)
+            except Exception as e:
+                print(f"Błąd zapisu: {e}")
+            alert_engine.process(sample)
+            if not first_stored:
+                first_stored = True
+                print(f"Pierwszy odczyt zapisany po {time.monotonic() - START_TIME:.1f} s od startu")
+        memory_guard.check()
+
+def stop_on_sigterm(*_):
+    # Kolejny SIGTERM (systemd i timeout wysyłają go do całej grupy procesów) nie przerywa sprzątania
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    sys.exit(0)
+
+def collect_data_multiprocess():
+    """Pomiary w tym procesie, predykcja i zapis w osobnych procesach (pierścienie w pamięci współdzielonej)"""
+    raw, enriched = SharedRing(), SharedRing()
+    fault_queue = multiprocessing.Queue()
+    # fork przed startem wątku PMS - procesy potomne dziedziczą pierścienie i nie używają czujników
+    ctx = multiprocessing.get_context('fork')
+    workers = [
+        ctx.Process(target=inference_process, args=(raw, enriched), daemon=True),
+        ctx.Process(target=storage_process, args=(enriched, fault_queue), daemon=True),
+    ]
+    for p in workers:
+        p.start()
+
+    threading.Thread(target=pms_worker, daemon=True).start()
+    scd4x.start_periodic_measurement()
+    wait_for_pms()
+
+    buffer = RingBuffer(BUFFER_SIZE)
+    conn = sqlite3.connect('sensors.db')
+    seed_buffer(conn, buffer)
+    conn.close()
+    detector = FaultDetector()
+
+    # Zatrzymanie usługi (SIGTERM) sprząta procesy i pamięć współdzieloną
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    print(f"Stacja aktywna (procesy: pomiary {os.getpid()}, predykcja {workers[0].pid}, zapis {workers[1].pid})")
+    # Stały rytm odczytów niezależnie od czasu trwania cyklu
+    next_tick = time.monotonic()
+    try:
+        while True:
+            if sensor_ready():
+                try:
+                    sample, faults = read_sample(detector, buffer)
+                    if faults:
+                        fault_queue.put([(sample.ts, *f) for f in faults])
+                    raw.publish(sample)
+                    buffer.append(sample)
+                except Exception as e:
+                    print(f"Błąd odczytu: {e}")
+
+            for p in workers:
+                if not p.is_alive():
+                    raise RuntimeError(f"proces {p.pid} zakończył się (kod {p.exitcode})")
+
+            next_tick += INTERVAL_S
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                print(f"Cykl odczytu spóźniony o {-delay:.1f} s")
+                next_tick = time.monotonic()
+            else:
+                time.sleep(delay)
+    finally:
+        for p in workers:
+            p.terminate()
+        for ring in (raw, enriched):
+            ring.close()
+            ring.unlink()
 
 if __name__ == "__main__":
     collect_data()
@@ -0,0 +1,70 @@
+import struct
+from array import array
+
+# Format pliku: nagłówek + płaskie tablice węzłów wszystkich drzew
+MAGIC = b'CFR1'
+HEADER = struct.Struct('<4sIII')  # magic, liczba drzew, liczba węzłów, liczba cech
+
+
+def export(model, path):
+    """Zapisuje RandomForestRegressor jako zwarte tablice (bez sklearn przy odczycie)"""
+    trees = [est.tree_ for est in model.estimators_]
+    offsets = array('I')
+    left, right, feature = array('i'), array('i'), array('i')
+    threshold, value = array('d'), array('f')
+
+    for tree in trees:
+        offsets.append(len(left))
+        left.extend(int(v) for v in tree.children_left)
+        right.extend(int(v) for v in tree.children_right)
+        feature.extend(int(v) for v in tree.feature)
+        threshold.extend(float(v) for v in tree.threshold)
+        value.extend(float(v) for v in tree.value[:, 0, 0])
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(trees), len(left), model.n_features_in_))
+        for arr in (offsets, left, right, feature, threshold, value):
+            arr.tofile(f)
+
+
+class CompactForest:
+    """Las regresyjny w tablicach array - predykcja w czystym Pythonie"""
+
+    __slots__ = ('offsets', 'left', 'right', 'feature', 'threshold', 'value', 'n_features')
+
+    @classmethod
+    def load(cls, path):
+        self = cls()
+        with open(path, 'rb') as f:
+            magic, n_trees, n_nodes, self.n_features = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Nieznany format modelu: {path}")
+
+            self.offsets = array('I')
+            self.offsets.fromfile(f, n_trees)
+            for name, code in (('left', 'i'), ('right', 'i'), ('feature', 'i'),
+                               ('threshold', 'd'), ('value', 'f')):
+                arr = array(code)
+                arr.fromfile(f, n_nodes)
+                setattr(self, name, arr)
+        return self
+
+    def predict_one(self, row):
+        """Predykcja dla jednego wiersza cech (lista liczb)"""
+        # sklearn porównuje cechy rzutowane na float32
+        x = struct.unpack(f'<{len(row)}f', struct.pack(f'<{len(row)}f', *row))
+        left, right, feature, threshold, value = self.left, self.right, self.feature, self.threshold, self.value
+
+        total = 0.0
+        for node in self.offsets:
+            base = node
+            while left[node] != -1:
+                if x[feature[node]] <= threshold[node]:
+                    node = base + left[node]
+                else:
+                    node = base + right[node]
+            total += value[node]
+        return total / len(self.offsets)
+
+    def predict(self, rows):
+        return [self.predict_one(row) for row in rows]
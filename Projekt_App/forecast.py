@@ -0,0 +1,109 @@
+import os
+import json
+import math
+import time
+
+# Progi CO2 (ppm), dla których liczony jest czas do przekroczenia, np. CO2_THRESHOLDS=1000,1200
+CO2_THRESHOLDS = [int(v) for v in os.environ.get('CO2_THRESHOLDS', '1000,1200').split(',') if v.strip()]
+FORECAST_FILE = os.environ.get('FORECAST_FILE', 'forecast.json')  # odczytywany przez /api/live
+TREND_WINDOW_S = 600     # stała czasowa wygładzania trendu (10 min)
+MODEL_HORIZON_S = 900    # pred_co2 to prognoza za 15 min
+MAX_HORIZON_MIN = 120    # dalej ekstrapolacja liniowa nie ma sensu -> None
+MAX_AGE_S = 60           # starszy plik prognozy = kolektor nie działa
+
+
+class ThresholdForecast:
+    """Czas do przekroczenia progów CO2 - stały koszt na próbkę
+
+    Trend to ważona wykładniczo regresja liniowa CO2 po czasie: sumy regresji są przesuwane
+    do czasu najnowszej próbki i wygaszane, więc bufor historii nie jest potrzebny. Gdy jest
+    prognoza modelu (pred_co2), nachylenie jest średnią trendu i kierunku wskazanego przez model.
+    """
+
+    __slots__ = ('thresholds', 'tau', 'last_ts', 'sw', 'swt', 'swy', 'swtt', 'swty',
+                 'level', 'slope', 'result')
+
+    def __init__(self, thresholds=None, tau=TREND_WINDOW_S):
+        self.thresholds = CO2_THRESHOLDS if thresholds is None else thresholds
+        self.tau = tau
+        self.last_ts = None
+        self.sw = self.swt = self.swy = self.swtt = self.swty = 0.0
+        self.level = None
+        self.slope = None
+        self.result = {}
+
+    def update(self, sample):
+        """Dokłada próbkę i zwraca {próg: minuty do przekroczenia (0 = już przekroczony) albo None}"""
+        if sample.co2 is None:
+            return self.result
+
+        if self.last_ts is not None:
+            dt = sample.ts - self.last_ts
+            if dt <= 0:
+                return self.result
+            # Czas liczony względem najnowszej próbki: stare punkty przesuwają się o -dt
+            self.swtt += -2 * dt * self.swt + dt * dt * self.sw
+            self.swty -= dt * self.swy
+            self.swt -= dt * self.sw
+            decay = math.exp(-dt / self.tau)
+            self.sw *= decay
+            self.swt *= decay
+            self.swy *= decay
+            self.swtt *= decay
+            self.swty *= decay
+        self.last_ts = sample.ts
+
+        # Nowy punkt w t = 0
+        self.sw += 1.0
+        self.swy += sample.co2
+
+        var = self.sw * self.swtt - self.swt ** 2
+        if var > 1e-9:
+            slope = (self.sw * self.swty - self.swt * self.swy) / var  # ppm/s
+            self.level = (self.swy - slope * self.swt) / self.sw
+        else:
+            slope = 0.0
+            self.level = float(sample.co2)
+        if sample.pred_co2 is not None:
+            slope = (slope + (sample.pred_co2 - sample.co2) / MODEL_HORIZON_S) / 2
+        self.slope = slope
+
+        self.result = {threshold: self.minutes_to(threshold, sample.co2) for threshold in self.thresholds}
+        return self.result
+
+    def minutes_to(self, threshold, co2):
+        if co2 >= threshold:
+            return 0
+        if self.slope <= 0:
+            return None
+        minutes = (threshold - self.level) / self.slope / 60
+        if minutes > MAX_HORIZON_MIN:
+            return None
+        return max(0, round(minutes))
+
+    def state(self, ts=None):
+        return {
+            'updated': ts or self.last_ts,
+            'level': round(self.level, 1) if self.level is not None else None,
+            'slope_ppm_min': round(self.slope * 60, 1) if self.slope is not None else None,
+            'thresholds': [{'ppm': k, 'minutes': v} for k, v in sorted(self.result.items())],
+        }
+
+    def save(self, path=FORECAST_FILE):
+        """Zapis atomowy (plik tymczasowy + rename) - serwer nie przeczyta połowy pliku"""
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state(), f)
+        os.replace(tmp, path)
+
+
+def load(path=FORECAST_FILE, max_age_s=MAX_AGE_S):
+    """Prognoza zapisana przez kolektor albo None (brak pliku lub nieaktualna)"""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not state.get('updated') or time.time() - state['updated'] > max_age_s:
+        return None
+    return state
@@ -0,0 +1,93 @@
+import time
+import sqlite3
+import argparse
+
+# Wersja wzoru IAQ zapisywana w kolumnie iaq_version - zmiana wag/progów = nowa wersja
+IAQ_VERSION = 1
+
+# Parametry wzoru (wspólne dla wersji skalarnej i wektorowej)
+CO2_BASE, CO2_SCALE = 400, 16
+PM25_SCALE = 2
+VOC_BASE, VOC_SCALE, VOC_DEFAULT = 150, 3.5, 100
+W_CO2, W_PM25, W_VOC = 0.3, 0.4, 0.3
+
+
+def calculate_iaq(co2, pm25, voc_index):
+    """Oblicza IAQ w skali 1-100 (100 = idealne)"""
+    safe_voc = voc_index if voc_index and voc_index > 0 else VOC_DEFAULT
+
+    score_co2 = max(0, 100 - (max(0, co2 - CO2_BASE) / CO2_SCALE))
+    score_pm25 = max(0, 100 - (pm25 * PM25_SCALE))
+    score_voc = max(0, 100 - (max(0, safe_voc - VOC_BASE) / VOC_SCALE))
+
+    total_iaq = (score_co2 * W_CO2) + (score_pm25 * W_PM25) + (score_voc * W_VOC)
+    return round(total_iaq)
+
+
+def calculate_iaq_np(co2, pm25, voc_index):
+    """Wektorowa wersja calculate_iaq dla tablic NumPy (NaN w co2/pm25 -> NaN)"""
+    import numpy as np
+
+    co2 = np.asarray(co2, dtype=float)
+    pm25 = np.asarray(pm25, dtype=float)
+    voc = np.asarray(voc_index, dtype=float)
+    safe_voc = np.where(voc > 0, voc, VOC_DEFAULT)  # NaN > 0 jest False
+
+    score_co2 = np.maximum(0, 100 - np.maximum(0, co2 - CO2_BASE) / CO2_SCALE)
+    score_pm25 = np.maximum(0, 100 - pm25 * PM25_SCALE)
+    score_voc = np.maximum(0, 100 - np.maximum(0, safe_voc - VOC_BASE) / VOC_SCALE)
+
+    return np.round(score_co2 * W_CO2 + score_pm25 * W_PM25 + score_voc * W_VOC)
+
+
+def ensure_version_column(conn):
+    """Dodaje kolumnę iaq_version do starszych baz"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(readings)')]
+    if 'iaq_version' not in columns:
+        conn.execute('ALTER TABLE readings ADD COLUMN iaq_version INTEGER')
+        conn.commit()
+
+
+def backfill(db_path='sensors.db', chunk=5000, force=False):
+    """Przelicza IAQ w całej tabeli porcjami, UPDATE w paczkach po `chunk` wierszy"""
+    import numpy as np
+
+    conn = sqlite3.connect(db_path)
+    ensure_version_column(conn)
+
+    version_filter = '' if force else 'AND (iaq_version IS NULL OR iaq_version != ?)'
+    params = () if force else (IAQ_VERSION,)
+
+    start = time.monotonic()
+    last_rowid, updated = 0, 0
+    while True:
+        rows = conn.execute(f'''SELECT rowid, co2, pm25, voc FROM readings
+                                WHERE rowid > ? {version_filter}
+                                ORDER BY rowid LIMIT ?''', (last_rowid, *params, chunk)).fetchall()
+        if not rows:
+            break
+
+        data = np.array(rows, dtype=float)  # NULL -> NaN
+        iaq = calculate_iaq_np(data[:, 1], data[:, 2], data[:, 3])
+        rowids = data[:, 0].astype(np.int64)
+
+        values = [(None if v != v else int(v), IAQ_VERSION, int(r)) for v, r in zip(iaq.tolist(), rowids.tolist())]
+        with conn:
+            conn.executemany('UPDATE readings SET iaq = ?, iaq_version = ? WHERE rowid = ?', values)
+
+        last_rowid = int(rowids[-1])
+        updated += len(rows)
+        print(f"Przeliczono {updated} wierszy...")
+
+    conn.close()
+    print(f"IAQ v{IAQ_VERSION}: zaktualizowano {updated} wierszy w {time.monotonic() - start:.1f} s")
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Przeliczenie IAQ w historycznych danych")
+    parser.add_argument('--db', default='sensors.db')
+    parser.add_argument('--chunk', type=int, default=5000)
+    parser.add_argument('--force', action='store_true', help="przelicz też wiersze z aktualną wersją")
+    args = parser.parse_args()
+    backfill(args.db, args.chunk, args.force)
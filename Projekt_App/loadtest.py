@@ -0,0 +1,261 @@
+import os
+import sys
+import time
+import json
+import random
+import shutil
+import socket
+import sqlite3
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from datetime import datetime
+
+import partitions
+from iaq import IAQ_VERSION, ensure_version_column
+
+# Wzorzec odpytywania jak w templates/index.html: /api/live co 5 s, a przy otwartym wykresie
+# dodatkowo pełna historia przy otwarciu i przyrost (?since=) przy każdym odświeżeniu
+REFRESH_S = 5.0
+CHART_SENSORS = ['co2', 'temp', 'hum', 'pm25', 'voc', 'iaq']
+CHART_RATIO = 0.3       # część klientów z otwartym wykresem
+CHART_SWITCH_S = 60     # średni czas oglądania jednego wykresu
+WRITE_INTERVAL_S = 10   # rytm zapisu kolektora
+COLUMNS = 'timestamp, temp, hum, co2, pm10, pm25, pm100, voc, iaq, pred_co2, iaq_version'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Stats:
+    """Czasy odpowiedzi i błędy wspólne dla wszystkich wątków"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.errors = {}
+
+    def add(self, name, seconds=None, error=None):
+        with self.lock:
+            if error is None:
+                self.latency.setdefault(name, []).append(seconds)
+            else:
+                self.errors.setdefault(name, {}).setdefault(error, 0)
+                self.errors[name][error] += 1
+
+    def snapshot(self):
+        """Kopia wyników pod blokadą - wątek, który nie zdążył się zakończyć, może jeszcze dopisywać"""
+        with self.lock:
+            return ({name: list(v) for name, v in self.latency.items()},
+                    {name: dict(e) for name, e in self.errors.items()})
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Client(threading.Thread):
+    """Jeden ekran (kiosk/telefon): odświeżanie co REFRESH_S, czasem z otwartym wykresem"""
+
+    def __init__(self, base_url, stats, stop, refresh_s=REFRESH_S, chart_ratio=CHART_RATIO):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.stats = stats
+        self.stop = stop
+        self.refresh_s = refresh_s
+        self.chart_ratio = chart_ratio
+        self.sensor = None
+        self.cursor = None
+        self.chart_until = 0.0
+
+    def get(self, name, path):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=30) as resp:
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            self.stats.add(name, error=f'HTTP {e.code}')
+            return None
+        except Exception as e:
+            self.stats.add(name, error=type(e).__name__)
+            return None
+        self.stats.add(name, time.perf_counter() - start)
+        return json.loads(body)
+
+    def chart(self):
+        now = time.monotonic()
+        if now >= self.chart_until:
+            # Zamknięcie wykresu albo przejście do innego
+            self.sensor = random.choice(CHART_SENSORS + ['prediction']) if random.random() < self.chart_ratio else None
+            self.cursor = None
+            self.chart_until = now + random.expovariate(1 / CHART_SWITCH_S)
+        if self.sensor is None:
+            return
+
+        if self.sensor == 'prediction':
+            path, name, key = '/api/prediction', 'prediction', 't'
+        else:
+            path, name, key = f'/api/history/{self.sensor}', 'history', 'timestamp'
+        if self.cursor:
+            path += '?since=' + urllib.request.quote(self.cursor)
+            name += '?since'
+        data = self.get(name, path)
+        if data:
+            self.cursor = data[-1][key]
+
+    def run(self):
+        # Ekrany nie odświeżają się równocześnie
+        self.stop.wait(random.uniform(0, self.refresh_s))
+        while not self.stop.is_set():
+            start = time.monotonic()
+            self.get('live', '/api/live')
+            self.chart()
+            self.stop.wait(max(0.0, self.refresh_s - (time.monotonic() - start)))
+
+
+class Writer(threading.Thread):
+    """Symulowany kolektor: jeden wiersz co `interval_s` w osobnej transakcji (jak store_sample)"""
+
+    def __init__(self, db_path, stats, stop, interval_s=WRITE_INTERVAL_S):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.stats = stats
+        self.stop = stop
+        self.interval_s = interval_s
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        ensure_version_column(conn)  # jak init_db w kolektorze
+        writer = partitions.PartitionWriter(self.db_path)
+        co2 = 800
+        while not self.stop.is_set():
+            ts = time.time()
+            co2 = max(400, co2 + random.randint(-20, 25))
+            row = (datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'), round(random.uniform(20, 24), 1),
+                   round(random.uniform(35, 55), 1), co2, 3.0, 5.0, 7.0, 100.0, 40.0, co2 + 10.0, IAQ_VERSION)
+            start = time.perf_counter()
+            try:
+                table = writer.table(conn, ts)
+                with conn:
+                    conn.execute(f'INSERT INTO {table} ({COLUMNS}) VALUES ({", ".join("?" * 11)})', row)
+                self.stats.add('zapis', time.perf_counter() - start)
+            except sqlite3.OperationalError as e:
+                self.stats.add('zapis', error=str(e))
+            self.stop.wait(self.interval_s)
+        conn.close()
+
+
+def prepare_copy(db_path):
+    """Kopia bazy (i partycji) w katalogu tymczasowym - test nie dopisuje wierszy do prawdziwej bazy"""
+    workdir = tempfile.mkdtemp(prefix='loadtest_')
+    shutil.copy(db_path, os.path.join(workdir, 'sensors.db'))
+    src = partitions.partition_dir(db_path)
+    if partitions.PARTITIONED and os.path.isdir(src):
+        shutil.copytree(src, partitions.partition_dir(os.path.join(workdir, 'sensors.db')))
+    return workdir
+
+
+def start_server(workdir, port):
+    """app.py w osobnym procesie (serwer Flask z wątkami, jak przy app.run)"""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=app_dir)
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    proc = subprocess.Popen([sys.executable, '-c', f'import app; app.app.run(host="127.0.0.1", port={port})'],
+                            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + '/api/live', timeout=1).close()
+            return proc, url
+        except Exception:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"serwer nie wystartował (log: {log.name})")
+
+
+def count_locked(workdir):
+    try:
+        with open(os.path.join(workdir, 'server.log')) as f:
+            return sum('locked' in line for line in f)
+    except OSError:
+        return 0
+
+
+def run_step(url, db_path, clients, duration_s, refresh_s, write_interval_s, chart_ratio):
+    stats = Stats()
+    stop = threading.Event()
+    threads = [Client(url, stats, stop, refresh_s, chart_ratio) for _ in range(clients)]
+    if db_path:
+        threads.append(Writer(db_path, stats, stop, write_interval_s))
+    for t in threads:
+        t.start()
+    time.sleep(duration_s)
+    stop.set()
+    for t in threads:
+        t.join(timeout=35)
+    alive = sum(t.is_alive() for t in threads)
+    if alive:
+        print(f"Uwaga: {alive} wątków nie zakończyło się (zawieszone zapytania) - wyniki bez ich ostatnich pomiarów")
+    return stats
+
+
+def report(stats, clients, duration_s):
+    latency, errors_by_name = stats.snapshot()
+    requests = sum(len(v) for name, v in latency.items() if name != 'zapis')
+    errors = sum(sum(e.values()) for name, e in errors_by_name.items() if name != 'zapis')
+    print(f"\n{clients} klientów: {requests / duration_s:.1f} zapytań/s, błędy: {errors}")
+    print(f"{'zapytanie':<20}{'liczba':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'maks ms':>10}")
+    for name in sorted(set(latency) | set(errors_by_name)):
+        times = latency.get(name, [])
+        if times:
+            p = [percentile(times, q) * 1000 for q in (0.5, 0.95, 0.99)] + [max(times) * 1000]
+            print(f"{name:<20}{len(times):>8}" + ''.join(f"{v:>10.1f}" for v in p))
+        for error, n in errors_by_name.get(name, {}).items():
+            print(f"{'' if times else name:<20}błąd {error}: {n}")
+    return requests, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Test obciążenia app.py: N ekranów + zapis kolektora")
+    parser.add_argument('--db', default='sensors.db', help="baza źródłowa (testowana jest jej kopia)")
+    parser.add_argument('--url', help="testuj działający serwer zamiast uruchamiać własny (bez zapisu)")
+    parser.add_argument('--clients', default='1,5,10,20', help="liczby klientów w kolejnych krokach")
+    parser.add_argument('--duration', type=float, default=60, help="czas kroku (s)")
+    parser.add_argument('--refresh', type=float, default=REFRESH_S, help="odstęp odświeżania ekranu (s)")
+    parser.add_argument('--write-interval', type=float, default=WRITE_INTERVAL_S, help="odstęp zapisów (s)")
+    parser.add_argument('--chart-ratio', type=float, default=CHART_RATIO, help="część ekranów z wykresem")
+    args = parser.parse_args()
+
+    proc = workdir = None
+    if args.url:
+        url, db_path = args.url.rstrip('/'), None
+    else:
+        workdir = prepare_copy(args.db)
+        db_path = os.path.join(workdir, 'sensors.db')
+        proc, url = start_server(workdir, free_port())
+        print(f"Serwer testowy {url} na kopii bazy w {workdir}")
+
+    try:
+        locked = 0
+        for clients in [int(n) for n in args.clients.split(',')]:
+            stats = run_step(url, db_path, clients, args.duration, args.refresh,
+                             args.write_interval, args.chart_ratio)
+            report(stats, clients, args.duration)
+            if workdir:
+                # /api/prediction łapie wyjątki i zwraca [], więc blokady widać tylko w logu serwera
+                total = count_locked(workdir)
+                print(f"Błędy blokady bazy w logu serwera: {total - locked}")
+                locked = total
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,56 @@
+import gc
+import ctypes
+import resource
+
+
+def rss_mb():
+    """Aktualne RSS procesu w MB (z /proc, awaryjnie szczytowe z getrusage)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb():
+    """Szczytowe RSS procesu w MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _trim_heap():
+    """Oddaje zwolnioną pamięć sterty do systemu (glibc)"""
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class MemoryGuard:
+    """Okresowy raport pamięci i pilnowanie limitu RSS"""
+
+    def __init__(self, ceiling_mb, report_every=60):
+        self.ceiling_mb = ceiling_mb
+        self.report_every = report_every
+        self.cycles = 0
+        self.steady_peak = 0.0
+
+    def check(self):
+        """Wywoływane raz na cykl pomiarowy; zwraca True, jeśli RSS mieści się w limicie"""
+        self.cycles += 1
+        rss = rss_mb()
+        self.steady_peak = max(self.steady_peak, rss)
+
+        if self.ceiling_mb and rss > self.ceiling_mb:
+            gc.collect()
+            _trim_heap()
+            rss = rss_mb()
+            if rss > self.ceiling_mb:
+                print(f"UWAGA: RSS {rss:.1f} MB powyżej limitu {self.ceiling_mb} MB")
+                return False
+
+        if self.cycles % self.report_every == 0:
+            print(f"Pamięć: RSS {rss:.1f} MB | maks. w pracy {self.steady_peak:.1f} MB | limit {self.ceiling_mb or '-'} MB")
+        return True
@@ -0,0 +1,183 @@
+import os
+import re
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+# Podział pomiarów na pliki miesięczne (domyślnie wyłączony - wszystko w sensors.db)
+PARTITIONED = os.environ.get('PARTITIONED', '0') == '1'
+PARTITION_DIR = os.environ.get('PARTITION_DIR', 'partitions')  # względem katalogu sensors.db
+MAX_ATTACHED = 10  # domyślny limit ATTACH w SQLite
+
+FILE_RE = re.compile(r'^readings_(\d{4})_(\d{2})\.db$')
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS readings
+            (timestamp DATETIME,
+             temp REAL, hum REAL, co2 INTEGER,
+             pm10 REAL, pm25 REAL, pm100 REAL,
+             voc REAL, iaq REAL, pred_co2 REAL, iaq_version INTEGER)'''
+COLUMNS = 'timestamp, temp, hum, co2, pm10, pm25, pm100, voc, iaq, pred_co2, iaq_version'
+
+
+def partition_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), PARTITION_DIR)
+
+
+def month_of(value):
+    """'RRRR-MM...' albo datetime -> 'RRRR_MM'"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y_%m')
+    return value[:4] + '_' + value[5:7]
+
+
+def partition_path(db_path, month):
+    return os.path.join(partition_dir(db_path), f'readings_{month}.db')
+
+
+def list_months(db_path):
+    """Istniejące partycje od najstarszej"""
+    path = partition_dir(db_path)
+    if not os.path.isdir(path):
+        return []
+    return sorted(f'{m.group(1)}_{m.group(2)}' for m in map(FILE_RE.match, os.listdir(path)) if m)
+
+
+def months_in_range(db_path, date_from=None, date_to=None):
+    """Partycje, które mogą zawierać wiersze z zakresu (bez otwierania plików)"""
+    lo = month_of(date_from) if date_from else '0000_00'
+    hi = month_of(date_to) if date_to else '9999_99'
+    return [m for m in list_months(db_path) if lo <= m <= hi]
+
+
+def ensure_partition(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_readings_timestamp ON readings (timestamp)')
+    conn.commit()
+    conn.close()
+
+
+def _attached(conn):
+    return {row[1] for row in conn.execute('PRAGMA database_list').fetchall()}
+
+
+def attach_range(conn, db_path, date_from=None, date_to=None):
+    """Dołącza partycje potrzebne dla zakresu i zwraca nazwę tabeli/widoku do zapytań
+
+    Bez podziału na partycje zwraca po prostu 'readings'. Widok obejmuje też main.readings
+    (dane sprzed przejścia na partycje, dopóki nie zostaną przeniesione poleceniem split).
+    """
+    if not PARTITIONED:
+        return 'readings'
+
+    months = months_in_range(db_path, date_from, date_to)
+    if len(months) > MAX_ATTACHED:
+        raise ValueError(f"zakres obejmuje {len(months)} partycji (limit {MAX_ATTACHED})")
+
+    attached = _attached(conn)
+    selects = [f'SELECT {COLUMNS} FROM main.readings']
+    for month in months:
+        schema = f'p_{month}'
+        if schema not in attached:
+            conn.execute('ATTACH DATABASE ? AS ' + schema, (partition_path(db_path, month),))
+        selects.append(f'SELECT {COLUMNS} FROM {schema}.readings')
+
+    conn.execute('DROP VIEW IF EXISTS temp.readings_range')
+    conn.execute('CREATE TEMP VIEW readings_range AS ' + ' UNION ALL '.join(selects))
+    return 'readings_range'
+
+
+def attach_hours(conn, db_path, hours):
+    """attach_range dla ostatnich `hours` godzin"""
+    since = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+    return attach_range(conn, db_path, since)
+
+
+class PartitionWriter:
+    """Tabela do zapisu bieżących pomiarów: partycja miesiąca dołączona do połączenia kolektora
+
+    Zapis idzie przez to samo połączenie co tabela faults, więc obie tabele są w jednej transakcji.
+    """
+
+    def __init__(self, db_path='sensors.db'):
+        self.db_path = db_path
+        self.month = None
+
+    def table(self, conn, ts):
+        if not PARTITIONED:
+            return 'readings'
+        month = month_of(datetime.fromtimestamp(ts))
+        if month != self.month:
+            if self.month is not None:
+                conn.execute('DETACH DATABASE part')
+            path = partition_path(self.db_path, month)
+            ensure_partition(path)
+            conn.execute('ATTACH DATABASE ? AS part', (path,))
+            self.month = month
+        return 'part.readings'
+
+
+def split(db_path, chunk=50000):
+    """Przenosi wiersze z main.readings do partycji miesięcznych (po jednym miesiącu)
+
+    Miesiąc jest przenoszony porcjami po `chunk` wierszy (kolejne rowid), każda w osobnej
+    transakcji - kolektor może zapisywać między porcjami, zamiast czekać na cały miesiąc.
+    """
+    conn = sqlite3.connect(db_path)
+    months = [row[0] for row in conn.execute(
+        "SELECT DISTINCT substr(timestamp, 1, 7) FROM readings ORDER BY 1").fetchall()]
+    for month_str in months:
+        month = month_of(month_str)
+        path = partition_path(db_path, month)
+        ensure_partition(path)
+        conn.execute('ATTACH DATABASE ? AS dst', (path,))
+        moved = 0
+        while True:
+            with conn:
+                ids = conn.execute('SELECT rowid FROM main.readings WHERE substr(timestamp, 1, 7) = ? '
+                                   'ORDER BY rowid LIMIT ?', (month_str, chunk)).fetchall()
+                if not ids:
+                    break
+                span = (month_str, ids[0][0], ids[-1][0])
+                moved += conn.execute(f'''INSERT INTO dst.readings ({COLUMNS})
+                                          SELECT {COLUMNS} FROM main.readings
+                                          WHERE substr(timestamp, 1, 7) = ? AND rowid BETWEEN ? AND ?
+                                          ORDER BY rowid''', span).rowcount
+                conn.execute('DELETE FROM main.readings WHERE substr(timestamp, 1, 7) = ? '
+                             'AND rowid BETWEEN ? AND ?', span)
+        conn.execute('DETACH DATABASE dst')
+        print(f"{month}: przeniesiono {moved} wierszy")
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def drop(db_path, month):
+    """Usunięcie miesiąca = usunięcie pliku"""
+    path = partition_path(db_path, month_of(month))
+    if not os.path.exists(path):
+        print(f"Brak partycji {path}")
+        return False
+    os.remove(path)
+    print(f"Usunięto {path}")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Partycje miesięczne tabeli readings")
+    parser.add_argument('--db', default='sensors.db')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('list', help="partycje i ich rozmiar")
+    sub.add_parser('split', help="przeniesienie danych z sensors.db do partycji")
+    p = sub.add_parser('drop', help="usunięcie miesiąca")
+    p.add_argument('month', help="RRRR-MM")
+    args = parser.parse_args()
+
+    if args.cmd == 'list':
+        for month in list_months(args.db):
+            path = partition_path(args.db, month)
+            print(f"{month}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    elif args.cmd == 'split':
+        split(args.db)
+    else:
+        drop(args.db, args.month)
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+
+# Konfiguracja
+MODEL_PATH = 'co2_model.pkl'
+COMPACT_MODEL_PATH = 'co2_model.cfr'
+FEATURES = ['co2', 'temp', 'hum', 'hour', 'day_of_week', 'co2_trend']
+
+
+def build_features(co2, temp, hum, now, trend):
+    """Wiersz cech w kolejności FEATURES (taki sam jak w train_model.py)"""
+    return [co2, temp, hum, now.hour, now.weekday(), trend]
+
+
+class Predictor:
+    """Model predykcji CO2 ładowany w tle razem z ciężkimi bibliotekami (pandas, joblib)
+
+    W trybie compact używany jest model z compact_model.py - bez pandas, numpy i sklearn.
+    """
+
+    def __init__(self, model_path=None, compact=False):
+        self.compact = compact
+        self.model_path = model_path or (COMPACT_MODEL_PATH if compact else MODEL_PATH)
+        self.model = None
+        self.ready = threading.Event()
+        self._mtime = None
+        self._loading = False
+        self._lock = threading.Lock()
+        self._pd = None
+
+    def start(self):
+        """Uruchamia ładowanie modelu w osobnym wątku"""
+        self._load_async()
+
+    def _load_async(self):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        start = time.monotonic()
+        try:
+            mtime = os.path.getmtime(self.model_path)
+            if self.compact:
+                from compact_model import CompactForest
+                model = CompactForest.load(self.model_path)
+            else:
+                import joblib
+                import pandas as pd
+                self._pd = pd
+                model = joblib.load(self.model_path)
+            self.model, self._mtime = model, mtime
+            self.ready.set()
+            print(f"Model załadowany w {time.monotonic() - start:.1f} s")
+        except Exception as e:
+            print(f"Błąd ładowania modelu: {e}")
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _check_reload(self):
+        """Przeładowuje model w tle, jeśli plik został nadpisany (nocny trening)"""
+        try:
+            if os.path.getmtime(self.model_path) != self._mtime:
+                self._load_async()
+        except OSError:
+            pass
+
+    def predict(self, co2, temp, hum, now, trend):
+        """Predykcja CO2 za 15 min albo None, dopóki model nie jest gotowy"""
+        self._check_reload()
+        if not self.ready.is_set():
+            return None
+
+        row = build_features(co2, temp, hum, now, trend)
+        if self.compact:
+            return round(self.model.predict_one(row), 1)
+        X_input = self._pd.DataFrame([row], columns=FEATURES)
+        return round(self.model.predict(X_input)[0], 1)
@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import cProfile
+from datetime import datetime
+
+# Konfiguracja (tryb profilowania jest domyślnie wyłączony)
+PROFILE_SQL = os.environ.get('PROFILE_SQL', '0') == '1'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '50'))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'slow_queries.log')
+
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+
+class ProfiledCursor:
+    """Wynik zapytania pobrany w całości (fetchall), z interfejsem kursora"""
+
+    def __init__(self, rows, description, lastrowid, rowcount):
+        self._rows = rows
+        self._pos = 0
+        self.description = description
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Połączenie mierzące czas, liczbę wierszy i plan wolnych zapytań"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cur = super().execute(sql, parameters)
+        rows = cur.fetchall()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= SLOW_QUERY_MS:
+            log_slow_query(self, sql, parameters, duration_ms, len(rows))
+
+        return ProfiledCursor(rows, cur.description, cur.lastrowid, cur.rowcount)
+
+
+def explain(conn, sql, parameters=()):
+    """Zwraca EXPLAIN QUERY PLAN jako listę linii"""
+    try:
+        cur = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters)
+        return [row[-1] for row in cur.fetchall()]
+    except sqlite3.Error as e:
+        return [f"(brak planu: {e})"]
+
+
+def log_slow_query(conn, sql, parameters, duration_ms, row_count):
+    """Zapisuje wolne zapytanie razem z planem do pliku logu"""
+    plan = explain(conn, sql, parameters) if sql.lstrip().upper().startswith('SELECT') else []
+    query = ' '.join(sql.split())
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    lines = [f"[{now}] {duration_ms:.1f} ms | wiersze: {row_count} | {query} | parametry: {tuple(parameters)}"]
+    lines += [f"    PLAN: {p}" for p in plan]
+
+    print(lines[0])
+    with open(SLOW_QUERY_LOG, 'a') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def connect(path):
+    """Otwiera bazę; w trybie PROFILE_SQL z pomiarem zapytań"""
+    if PROFILE_SQL:
+        return sqlite3.connect(path, factory=ProfilingConnection)
+    return sqlite3.connect(path)
+
+
+def init_app(app):
+    """Rejestruje profilowanie cProfile dla każdego żądania (PROFILE_REQUESTS=1)"""
+    if not PROFILE_REQUESTS:
+        return
+
+    from flask import g, request
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    @app.before_request
+    def _start_profile():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        profiler.disable()
+        name = (request.endpoint or 'unknown').replace('.', '_')
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{stamp}_{name}.prof"))
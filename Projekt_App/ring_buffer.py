@@ -0,0 +1,67 @@
+from array import array
+
+# Kolumny próbki w kolejności zapisu do bufora
+FIELDS = ('ts', 'temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq', 'pred_co2')
+NAN = float('nan')
+
+
+class Sample:
+    """Pojedynczy odczyt (None = brak wartości)"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for name in FIELDS:
+            setattr(self, name, values.get(name))
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in FIELDS)
+
+
+class RingBuffer:
+    """Bufor ostatnich próbek o stałym rozmiarze - jedna tablica array('d') na kolumnę"""
+
+    __slots__ = ('capacity', 'columns', 'head', 'size')
+
+    def __init__(self, capacity=360):
+        self.capacity = capacity
+        self.columns = {name: array('d', [NAN]) * capacity for name in FIELDS}
+        self.head = 0
+        self.size = 0
+
+    def append(self, sample):
+        i = self.head
+        for name in FIELDS:
+            value = getattr(sample, name)
+            self.columns[name][i] = NAN if value is None else value
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def __len__(self):
+        return self.size
+
+    def _index(self, age):
+        """Indeks próbki sprzed `age` kroków (0 = najnowsza)"""
+        if not 0 <= age < self.size:
+            raise IndexError(age)
+        return (self.head - 1 - age) % self.capacity
+
+    def get(self, name, age=0):
+        value = self.columns[name][self._index(age)]
+        return None if value != value else value
+
+    def latest(self):
+        """Najnowsza próbka jako obiekt Sample"""
+        if not self.size:
+            return None
+        return Sample(**{name: self.get(name) for name in FIELDS})
+
+    def values(self, name):
+        """Wartości kolumny od najstarszej do najnowszej (bez braków)"""
+        col = self.columns[name]
+        out = []
+        for age in range(self.size - 1, -1, -1):
+            v = col[(self.head - 1 - age) % self.capacity]
+            if v == v:
+                out.append(v)
+        return out
@@ -0,0 +1,185 @@
+import time
+import threading
+from smbus2 import SMBus, i2c_msg
+
+# Adresy czujników Sensirion na magistrali I2C
+SHT40_ADDR = 0x44
+SGP40_ADDR = 0x59
+SCD41_ADDR = 0x62
+
+
+class CRCError(IOError):
+    """Błędna suma kontrolna CRC w odpowiedzi czujnika"""
+
+
+def crc8(data):
+    """CRC-8 Sensirion (wielomian 0x31, start 0xFF)"""
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def pack_words(words):
+    """Słowa 16-bit -> bajty z CRC po każdym słowie"""
+    out = []
+    for word in words:
+        pair = [(word >> 8) & 0xFF, word & 0xFF]
+        out += pair + [crc8(pair)]
+    return out
+
+
+def unpack_words(data, addr=None):
+    """Bajty odpowiedzi (MSB, LSB, CRC)... -> lista słów, z weryfikacją CRC"""
+    words = []
+    for i in range(0, len(data), 3):
+        pair = data[i:i + 2]
+        if crc8(pair) != data[i + 2]:
+            raise CRCError(f"CRC 0x{addr or 0:02X}: odczyt {bytes(data).hex()}")
+        words.append(pair[0] << 8 | pair[1])
+    return words
+
+
+class SensirionBus:
+    """Jeden otwarty uchwyt SMBus współdzielony przez wszystkie czujniki"""
+
+    def __init__(self, bus=1):
+        self.bus = SMBus(bus)
+        self.lock = threading.Lock()
+
+    def transfer(self, addr, command, n_words=0, delay=0.0):
+        """Komenda (+ opcjonalny odczyt n_words słów po czasie wykonania `delay`)
+
+        Każda komenda Sensirion to osobny zapis, czas wykonania i osobny odczyt - czujniki nie
+        odpowiadają w trakcie konwersji, więc zapisu i odczytu nie da się połączyć w jedną transakcję.
+        """
+        # Blokada tylko na czas transakcji - inne czujniki mogą działać w trakcie konwersji
+        with self.lock:
+            self.bus.i2c_rdwr(i2c_msg.write(addr, command))
+        if delay:
+            time.sleep(delay)
+        if not n_words:
+            return []
+        read = i2c_msg.read(addr, n_words * 3)
+        with self.lock:
+            self.bus.i2c_rdwr(read)
+        return unpack_words(list(read), addr)
+
+    def close(self):
+        self.bus.close()
+
+
+class SHT40:
+    """SHT40 - temperatura i wilgotność (interfejs jak adafruit_sht4x)"""
+
+    # Komenda i maksymalny czas konwersji wg karty katalogowej
+    PRECISION = {
+        'high': (0xFD, 0.0083),
+        'medium': (0xF6, 0.0045),
+        'low': (0xE0, 0.0017),
+    }
+
+    def __init__(self, bus, precision='high', addr=SHT40_ADDR):
+        self.bus = bus
+        self.addr = addr
+        self.command, self.delay = self.PRECISION[precision]
+
+    @staticmethod
+    def convert(words):
+        temp_raw, hum_raw = words
+        temperature = -45 + 175 * (temp_raw / 65535.0)
+        humidity = min(100.0, max(0.0, -6 + 125 * (hum_raw / 65535.0)))
+        return temperature, humidity
+
+    @property
+    def measurements(self):
+        """(temperatura °C, wilgotność %)"""
+        return self.convert(self.bus.transfer(self.addr, [self.command], 2, self.delay))
+
+
+class SGP40:
+    """SGP40 - VOC (interfejs jak adafruit_sgp40)"""
+
+    MEASURE_RAW = [0x26, 0x0F]
+    MEASURE_DELAY = 0.030
+
+    def __init__(self, bus, addr=SGP40_ADDR):
+        self.bus = bus
+        self.addr = addr
+        self._voc_algorithm = None
+
+    @staticmethod
+    def measure_command(temperature=25, relative_humidity=50):
+        """Komenda pomiaru z kompensacją temperatury i wilgotności"""
+        hum_ticks = int(max(0, min(100, relative_humidity)) * 65535 / 100)
+        temp_ticks = int((max(-45, min(130, temperature)) + 45) * 65535 / 175)
+        return SGP40.MEASURE_RAW + pack_words([hum_ticks, temp_ticks])
+
+    def measure_raw(self, temperature=25, relative_humidity=50):
+        return self.bus.transfer(self.addr, self.measure_command(temperature, relative_humidity),
+                                 1, self.MEASURE_DELAY)[0]
+
+    def measure_index(self, temperature=25, relative_humidity=50):
+        """Indeks VOC z algorytmu Sensirion (z pakietu adafruit_sgp40)"""
+        return self.voc_index(self.measure_raw(temperature, relative_humidity))
+
+    def voc_index(self, raw):
+        if self._voc_algorithm is None:
+            from adafruit_sgp40.voc_algorithm import VOCAlgorithm
+            self._voc_algorithm = VOCAlgorithm()
+            self._voc_algorithm.vocalgorithm_init()
+        return self._voc_algorithm.vocalgorithm_process(raw)
+
+
+class SCD41:
+    """SCD41 - CO2 w trybie pomiaru okresowego (interfejs jak adafruit_scd4x)"""
+
+    def __init__(self, bus, addr=SCD41_ADDR):
+        self.bus = bus
+        self.addr = addr
+        self._co2 = None
+        self._temperature = None
+        self._relative_humidity = None
+
+    def start_periodic_measurement(self):
+        self.bus.transfer(self.addr, [0x21, 0xB1])
+
+    def stop_periodic_measurement(self):
+        self.bus.transfer(self.addr, [0x3F, 0x86], delay=0.5)
+
+    @property
+    def data_ready(self):
+        word, = self.bus.transfer(self.addr, [0xE4, 0xB8], 1, 0.001)
+        return (word & 0x07FF) != 0
+
+    @staticmethod
+    def convert(words):
+        co2, temp_raw, hum_raw = words
+        return co2, -45 + 175 * (temp_raw / 65535.0), 100 * (hum_raw / 65535.0)
+
+    def read_measurement(self):
+        """(CO2 ppm, temperatura °C, wilgotność %)"""
+        values = self.convert(self.bus.transfer(self.addr, [0xEC, 0x05], 3, 0.001))
+        self._co2, self._temperature, self._relative_humidity = values
+        return values
+
+    def _refresh(self):
+        if self.data_ready:
+            self.read_measurement()
+
+    @property
+    def CO2(self):
+        self._refresh()
+        return self._co2
+
+    @property
+    def temperature(self):
+        self._refresh()
+        return self._temperature
+
+    @property
+    def relative_humidity(self):
+        self._refresh()
+        return self._relative_humidity
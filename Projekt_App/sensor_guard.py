@@ -0,0 +1,156 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Limity czasu odczytu (s) - kilkukrotność czasu konwersji z kart katalogowych
+TIMEOUTS = {
+    'sht40': 0.5,
+    'sgp40': 1.0,
+    'scd41': 1.0,
+    'pms5003': 5.0,   # PMS wysyła ramkę co ok. 1 s - starsza wartość jest nieaktualna
+}
+MAX_STALE_S = 60      # dłużej niż tyle ostatnia dobra wartość nie zastępuje odczytu (-> NULL)
+
+
+class BusGate:
+    """Wspólna magistrala kilku czujników
+
+    Przy `exclusive` (sterowniki bez blokady na czas transakcji, odczyty po kolei) żaden odczyt
+    nie startuje, dopóki inny czujnik na tej magistrali ma zawieszony odczyt - wątek, który
+    przekroczył limit czasu, może nadal korzystać z magistrali.
+    """
+
+    def __init__(self, exclusive=True):
+        self.exclusive = exclusive
+        self.guards = []
+
+    def busy(self, guard):
+        """Nazwa czujnika z zawieszonym odczytem (innego niż `guard`) albo None"""
+        if not self.exclusive:
+            return None
+        for other in self.guards:
+            if other is not guard and other.hung():
+                return other.name
+        return None
+
+
+class SensorGuard:
+    """Odczyt czujnika z limitem czasu; po przekroczeniu - ostatnia dobra wartość albo None
+
+    Odczyt działa w osobnym wątku (po jednym na czujnik). Zawieszony odczyt nie blokuje
+    pętli, a dopóki się nie zakończy, kolejne wywołania od razu zwracają wartość zastępczą.
+    """
+
+    def __init__(self, name, timeout_s=None, max_stale_s=MAX_STALE_S, bus=None):
+        self.name = name
+        self.bus = bus
+        if bus is not None:
+            bus.guards.append(self)
+        self.timeout_s = TIMEOUTS.get(name, 1.0) if timeout_s is None else timeout_s
+        self.max_stale_s = max_stale_s
+        self.value = None
+        self.updated = None
+        self.timeouts = 0
+        self.errors = 0
+        self.degraded = False
+        self._pool = None
+        self._pending = None
+        self._started = None
+        self._deadline = 0.0
+        self._blocked_by = None
+        self.first = threading.Event()  # pierwszy poprawny odczyt od startu
+
+    def update(self, value):
+        """Zapamiętuje poprawny odczyt"""
+        self.value = value
+        self.updated = time.monotonic()
+        self.first.set()
+        if self.degraded:
+            self.degraded = False
+            print(f"Czujnik {self.name} odpowiada ({self.summary()})")
+
+    def age(self):
+        return None if self.updated is None else time.monotonic() - self.updated
+
+    def hung(self):
+        """Odczyt z poprzedniego cyklu jeszcze trwa"""
+        return self._pending is not None and not self._pending.done()
+
+    def fallback(self):
+        """(ostatnia dobra wartość, jej wiek w s) albo (None, wiek), gdy jest za stara"""
+        if not self.degraded:
+            self.degraded = True
+            if self._blocked_by:
+                print(f"Czujnik {self.name} pominięty - magistrala zajęta przez zawieszony {self._blocked_by}")
+            else:
+                print(f"Czujnik {self.name} nie odpowiada w {self.timeout_s} s - ostatnia dobra wartość lub NULL")
+        age = self.age()
+        if age is None or age > self.max_stale_s:
+            return None, age
+        return self.value, age
+
+    def start(self, fn, *args):
+        """Uruchamia odczyt w tle (bez czekania) - kilka czujników może mierzyć jednocześnie"""
+        self._deadline = time.monotonic() + self.timeout_s
+        self._blocked_by = self.bus.busy(self) if self.bus is not None else None
+        if self.hung() or self._blocked_by:
+            # Poprzedni odczyt (tego albo innego czujnika na magistrali) nadal wisi - nie dokładamy kolejnego
+            self._started = None
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self._pending = self._started = self._pool.submit(fn, *args)
+
+    def result(self):
+        """Wynik odczytu z start() w ramach limitu czasu: (wartość, wiek) - wiek None dla świeżego"""
+        if self._started is None:
+            self.timeouts += 1
+            return self.fallback()
+        try:
+            value = self._started.result(timeout=max(0.0, self._deadline - time.monotonic()))
+        except TimeoutError:
+            self.timeouts += 1
+            return self.fallback()
+        except Exception:
+            self.errors += 1
+            return self.fallback()
+
+        self.update(value)
+        return value, None
+
+    def read(self, fn, *args):
+        """Odczyt z czekaniem na wynik: (wartość, wiek)"""
+        self.start(fn, *args)
+        return self.result()
+
+    def current(self):
+        """Dla czujników czytanych w osobnym wątku (PMS): wartość z update() albo zastępcza
+
+        Przed pierwszym poprawnym odczytem zwraca (None, None) - brak danych po starcie nie jest awarią.
+        """
+        age = self.age()
+        if age is None:
+            return None, None
+        if age is not None and age <= self.timeout_s:
+            return self.value, None
+        self.timeouts += 1
+        return self.fallback()
+
+    def summary(self):
+        return f"{self.name}: przekroczenia {self.timeouts}, błędy {self.errors}"
+
+
+class CycleTimer:
+    """Czas odczytu wszystkich czujników w cyklu - średnia i maksimum co `report_every` cykli"""
+
+    def __init__(self, label, report_every=60):
+        self.label = label
+        self.report_every = report_every
+        self.times = []
+
+    def add(self, seconds):
+        self.times.append(seconds)
+        if len(self.times) >= self.report_every:
+            print(f"Odczyt czujników ({self.label}): śr. {sum(self.times) / len(self.times) * 1000:.0f} ms, "
+                  f"maks. {max(self.times) * 1000:.0f} ms z {len(self.times)} cykli")
+            self.times = []
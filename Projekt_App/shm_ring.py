@@ -0,0 +1,94 @@
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+
+from ring_buffer import FIELDS, Sample
+
+# Układ pamięci:
+#   nagłówek: liczba zapisanych próbek (uint64)
+#   sloty: numer próbki (uint64, 0 = zapis w toku) + kolumny FIELDS jako float64 (NaN = brak)
+HEADER = struct.Struct('<Q')
+SLOT = struct.Struct('<Q' + 'd' * len(FIELDS))
+NAN = float('nan')
+
+
+class SharedRing:
+    """Bufor cykliczny próbek w pamięci współdzielonej: jeden proces zapisuje, wiele czyta
+
+    Każdy czytelnik ma własny licznik, więc wolny konsument nie blokuje zapisu - najwyżej
+    traci najstarsze próbki (zgłaszane jako pominięte). Czytelnicy śpią na warunku, który
+    zapis budzi po każdej próbce - bufor i warunek są przekazywane procesom potomnym przy fork.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + capacity * SLOT.size)
+        HEADER.pack_into(self.shm.buf, 0, 0)
+        self.name = self.shm.name
+        self.changed = multiprocessing.Condition()
+
+    def _offset(self, seq):
+        return HEADER.size + (seq % self.capacity) * SLOT.size
+
+    def count(self):
+        return HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def publish(self, sample):
+        """Zapis próbki (tylko jeden proces piszący)"""
+        seq = self.count()
+        offset = self._offset(seq)
+        values = [NAN if v is None else v for v in sample.as_tuple()]
+        # Numer 0 na czas zapisu - czytelnik pominie niedokończony slot
+        struct.pack_into('<Q', self.shm.buf, offset, 0)
+        SLOT.pack_into(self.shm.buf, offset, seq + 1, *values)
+        HEADER.pack_into(self.shm.buf, 0, seq + 1)
+        with self.changed:
+            self.changed.notify_all()
+
+    def reader(self, start=None):
+        return RingReader(self, self.count() if start is None else start)
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class RingReader:
+    """Kursor czytelnika SharedRing"""
+
+    def __init__(self, ring, start=0):
+        self.ring = ring
+        self.next = start
+        self.skipped = 0
+
+    def poll(self):
+        """Nowe próbki od ostatniego wywołania (lista Sample, od najstarszej)"""
+        ring = self.ring
+        end = ring.count()
+        if end - self.next > ring.capacity:
+            # Konsument nie nadążył - najstarsze próbki zostały już nadpisane
+            self.skipped += end - self.next - ring.capacity
+            self.next = end - ring.capacity
+
+        samples = []
+        while self.next < end:
+            seq, *values = SLOT.unpack_from(ring.shm.buf, ring._offset(self.next))
+            # Slot nadpisany w trakcie odczytu -> numer się nie zgadza
+            if seq != self.next + 1 or SLOT.unpack_from(ring.shm.buf, ring._offset(self.next))[0] != seq:
+                self.skipped += 1
+            else:
+                samples.append(Sample(**{name: None if v != v else v for name, v in zip(FIELDS, values)}))
+            self.next += 1
+        return samples
+
+    def wait(self, timeout=None):
+        """Czeka (bez odpytywania) na co najmniej jedną nową próbkę; pusta lista po timeout"""
+        samples = self.poll()
+        if samples:
+            return samples
+        with self.ring.changed:
+            # Warunek sprawdzany pod blokadą - próbka zapisana przed wait_for nie zostanie przegapiona
+            self.ring.changed.wait_for(lambda: self.ring.count() > self.next, timeout)
+        return self.poll()
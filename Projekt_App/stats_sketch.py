@@ -0,0 +1,262 @@
+import math
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+import partitions
+
+# Statystyki godzinowe i dzienne liczone na bieżąco przez kolektor
+METRICS = ['temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq', 'pred_co2']
+RELATIVE_ACCURACY = 0.01  # błąd względny kwantyli (1%)
+FLUSH_EVERY = 30          # zapis bieżącej godziny co tyle próbek (5 min przy odczycie co 10 s)
+
+
+class QuantileSketch:
+    """Szkic kwantyli z logarytmicznymi przedziałami (jak DDSketch) - łączenie = dodanie liczników
+
+    Kwantyl ma błąd względny najwyżej RELATIVE_ACCURACY niezależnie od liczby próbek.
+    """
+
+    __slots__ = ('pos', 'neg', 'zero', 'count', 'min', 'max', 'sum')
+
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self):
+        self.pos = {}
+        self.neg = {}
+        self.zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def add(self, value):
+        if value > 0:
+            key = math.ceil(math.log(value) / self.LOG_GAMMA)
+            self.pos[key] = self.pos.get(key, 0) + 1
+        elif value < 0:
+            key = math.ceil(math.log(-value) / self.LOG_GAMMA)
+            self.neg[key] = self.neg.get(key, 0) + 1
+        else:
+            self.zero += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for key, n in other.pos.items():
+            self.pos[key] = self.pos.get(key, 0) + n
+        for key, n in other.neg.items():
+            self.neg[key] = self.neg.get(key, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, key):
+        # Środek przedziału (gamma^(k-1), gamma^k] w sensie błędu względnego
+        return 2 * self.GAMMA ** key / (1 + self.GAMMA)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.neg, reverse=True):
+            seen += self.neg[key]
+            if seen > rank:
+                return max(self.min, -self._value(key))
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.pos):
+            seen += self.pos[key]
+            if seen > rank:
+                return min(self.max, self._value(key))
+        return self.max
+
+    def to_json(self):
+        return json.dumps({'p': self.pos, 'n': self.neg, 'z': self.zero}, separators=(',', ':'))
+
+    @classmethod
+    def from_row(cls, count, min_value, max_value, total, sketch):
+        s = cls()
+        data = json.loads(sketch)
+        s.pos = {int(k): v for k, v in data['p'].items()}
+        s.neg = {int(k): v for k, v in data['n'].items()}
+        s.zero = data['z']
+        s.count, s.min, s.max, s.sum = count, min_value, max_value, total
+        return s
+
+
+def ensure_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS stats
+                    (period TEXT, start TEXT, metric TEXT,
+                     count INTEGER, min REAL, max REAL, sum REAL, sketch TEXT,
+                     closed INTEGER DEFAULT 0,
+                     PRIMARY KEY (period, start, metric))''')
+
+
+def _load(conn, period, start, metric):
+    row = conn.execute('SELECT count, min, max, sum, sketch FROM stats WHERE period = ? AND start = ? AND metric = ?',
+                       (period, start, metric)).fetchone()
+    return QuantileSketch.from_row(*row) if row else None
+
+
+def _save(conn, period, start, metric, sketch, closed=0):
+    conn.execute('INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                 (period, start, metric, sketch.count, sketch.min, sketch.max, sketch.sum, sketch.to_json(), closed))
+
+
+def close_hour(conn, hour, sketches):
+    """Ostatni zapis godziny i dołączenie jej do dnia (w jednej transakcji)"""
+    day = hour[:10]
+    with conn:
+        for metric, sketch in sketches.items():
+            if not sketch.count:
+                continue
+            _save(conn, 'hour', hour, metric, sketch, closed=1)
+            day_sketch = _load(conn, 'day', day, metric) or QuantileSketch()
+            _save(conn, 'day', day, metric, day_sketch.merge(sketch))
+
+
+def close_pending(conn, before):
+    """Godziny zapisane przed przerwą w pracy, które nie trafiły jeszcze do dnia"""
+    hours = [r[0] for r in conn.execute(
+        "SELECT DISTINCT start FROM stats WHERE period = 'hour' AND closed = 0 AND start < ? ORDER BY start",
+        (before,)).fetchall()]
+    for hour in hours:
+        close_hour(conn, hour, {m: _load(conn, 'hour', hour, m) or QuantileSketch() for m in METRICS})
+
+
+class StatsAggregator:
+    """Szkice bieżącej godziny w pamięci; stały koszt na próbkę, zapis co FLUSH_EVERY próbek
+
+    Wiersz godziny jest nadpisywany przy każdym zapisie, a po zamknięciu godziny jej szkic jest
+    dołączany do wiersza dnia.
+    """
+
+    def __init__(self, flush_every=FLUSH_EVERY):
+        self.flush_every = flush_every
+        self.hour = None
+        self.sketches = {}
+        self.pending = 0
+
+    def add(self, conn, timestamp, sample):
+        """timestamp - czas lokalny 'RRRR-MM-DD HH:MM:SS' jak w tabeli readings"""
+        hour = timestamp[:13] + ':00'
+        if hour != self.hour:
+            if self.hour is None:
+                with conn:
+                    ensure_table(conn)
+                close_pending(conn, hour)
+            else:
+                close_hour(conn, self.hour, self.sketches)
+            self.hour = hour
+            # Po restarcie w tej samej godzinie - kontynuacja zapisanego szkicu
+            self.sketches = {m: _load(conn, 'hour', hour, m) or QuantileSketch() for m in METRICS}
+            self.pending = 0
+
+        for metric in METRICS:
+            value = getattr(sample, metric)
+            if value is not None:
+                self.sketches[metric].add(value)
+
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush(conn)
+
+    def flush(self, conn):
+        """Zapis bieżącej (niezamkniętej) godziny"""
+        with conn:
+            for metric, sketch in self.sketches.items():
+                if sketch.count:
+                    _save(conn, 'hour', self.hour, metric, sketch)
+        self.pending = 0
+
+
+def query(conn, metric, date_from, date_to, group='day'):
+    """Szkice dla zakresu [date_from, date_to) połączone według grupy: 'hour', 'day' albo 'total'
+
+    Pełne dni przed dniem bieżącym są czytane z wierszy dziennych, pozostałe godziny z godzinowych.
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    rows = conn.execute('''SELECT period, start, count, min, max, sum, sketch FROM stats
+                           WHERE metric = ? AND start >= ? AND start < ?
+                           ORDER BY start''', (metric, date_from, date_to)).fetchall()
+    use_days = group != 'hour'
+    full_days = {r[1] for r in rows if r[0] == 'day' and r[1] < today
+                 and r[1] >= date_from and next_day(r[1]) <= date_to} if use_days else set()
+
+    groups = {}
+    for period, start, *values in rows:
+        if period == 'day' and start not in full_days:
+            continue
+        if period == 'hour' and start[:10] in full_days:
+            continue
+        key = 'total' if group == 'total' else (start if group == 'hour' else start[:10])
+        sketch = QuantileSketch.from_row(*values)
+        groups[key] = groups[key].merge(sketch) if key in groups else sketch
+    return groups
+
+
+def next_day(day):
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def summary(sketch, quantiles):
+    out = {
+        'count': sketch.count,
+        'min': round(sketch.min, 1),
+        'max': round(sketch.max, 1),
+        'mean': round(sketch.sum / sketch.count, 1),
+    }
+    for q in quantiles:
+        out[f'p{round(q * 100, 4):g}'] = round(sketch.quantile(q), 1)  # 0.999 -> p99.9
+    return out
+
+
+def rebuild(db_path, date_from=None):
+    """Przeliczenie statystyk z istniejących pomiarów (np. po włączeniu funkcji)"""
+    from ring_buffer import Sample
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        ensure_table(conn)
+        conn.execute('DELETE FROM stats WHERE start >= ?', (date_from or '',))
+    aggregator = StatsAggregator(flush_every=10 ** 9)
+    table = partitions.attach_range(conn, db_path, date_from)
+    days = [r[0] for r in conn.execute(f'SELECT DISTINCT substr(timestamp, 1, 10) FROM {table} '
+                                       f'WHERE timestamp >= ? ORDER BY 1', (date_from or '',)).fetchall()]
+    count = 0
+    # Po jednym dniu - zapisy statystyk nie mogą przerywać otwartego kursora odczytu
+    for day in days:
+        rows = conn.execute(f'SELECT timestamp, {", ".join(METRICS)} FROM {table} '
+                            f'WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp',
+                            (day, next_day(day))).fetchall()
+        for row in rows:
+            aggregator.add(conn, row[0], Sample(**dict(zip(METRICS, row[1:]))))
+        count += len(rows)
+    if aggregator.hour is not None:
+        # Godzina bieżąca zostaje otwarta (kolektor ją dokończy), wcześniejsze trafiają do dni
+        if aggregator.hour < datetime.now().strftime('%Y-%m-%d %H:00'):
+            close_hour(conn, aggregator.hour, aggregator.sketches)
+        else:
+            aggregator.flush(conn)
+    conn.close()
+    print(f"Przeliczono statystyki z {count} wierszy")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Statystyki godzinowe/dzienne na szkicach kwantyli")
+    parser.add_argument('--db', default='sensors.db')
+    parser.add_argument('--since', help="przelicz od RRRR-MM-DD (domyślnie całą historię)")
+    args = parser.parse_args()
+    rebuild(args.db, args.since)
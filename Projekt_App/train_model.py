@@ -1,25 +1,77 @@
 import sqlite3
+import json
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import shutil
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
+import compact_model
+import partitions
+import archive
 from datetime import datetime, timedelta
 
-def train():
-    # Pobieranie danych z bazy
-    conn = sqlite3.connect('/home/michal/Projekt_App/sensors.db')
-    # Dane z ostatnich 14 dni
-    date_limit = (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
-    df = pd.read_sql_query(f"SELECT timestamp, co2, temp, hum FROM readings WHERE timestamp > '{date_limit}'", conn)
-    conn.close()
+DB_PATH = '/home/michal/Projekt_App/sensors.db'
+MODEL_PATH = '/home/michal/Projekt_App/co2_model.pkl'
+COMPACT_MODEL_PATH = '/home/michal/Projekt_App/co2_model.cfr'
+PARAMS_PATH = '/home/michal/Projekt_App/co2_model_params.json'
+STATE_PATH = '/home/michal/Projekt_App/co2_model_state.json'
+FEATURES = ['co2', 'temp', 'hum', 'hour', 'day_of_week', 'co2_trend']
+DEFAULT_PARAMS = {'n_estimators': 100}
 
-    if len(df) < 100: 
-        print("Zbyt mało danych do trenowania modelu.")
-        return
+# Kiedy trening ma sens
+MIN_NEW_ROWS = 2000        # ok. 5,5 h pomiarów co 10 s
+DRIFT_FACTOR = 1.5         # MAE z ostatniej doby > 1.5 x MAE z testu = dryf -> pełny trening
+MAX_MODEL_AGE_DAYS = 3     # bez dryfu model jest douczany najwyżej co tyle dni
+DRIFT_WINDOW_HOURS = 24
+
+# Douczanie (warm start) - nowe drzewa trenowane tylko na nowych danych
+WARM_TREES = 20
+MAX_TREES = 200            # powyżej - pełny trening od zera
 
+def load_params():
+    """Parametry modelu wybrane przez --tune (albo domyślne)"""
+    try:
+        with open(PARAMS_PATH) as f:
+            return json.load(f)['params']
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_PARAMS
+
+def save_params(params, cv_rmse, evaluated):
+    with open(PARAMS_PATH, 'w') as f:
+        json.dump({
+            'params': params,
+            'cv_rmse': round(cv_rmse, 2),
+            'evaluated': evaluated,
+            'tuned_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }, f, indent=2)
+
+def load_data(db_path=DB_PATH, date_from=None, date_to=None):
+    """Odczyt surowych pomiarów (co2, temp, hum) z zadanego zakresu dat
+
+    Początkowe dni zakresu zarchiwizowane przez archive.py są czytane z archiwum, reszta z bazy.
+    """
+    archived, date_from = archive.load_leading(db_path, date_from, date_to, ['co2', 'temp', 'hum'])
+
+    conn = sqlite3.connect(db_path)
+    table = partitions.attach_range(conn, db_path, date_from, date_to)
+    query = f"SELECT timestamp, co2, temp, hum FROM {table} WHERE 1=1"
+    params = []
+    if date_from:
+        query += " AND timestamp > ?"
+        params.append(date_from)
+    if date_to:
+        query += " AND timestamp <= ?"
+        params.append(date_to)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return pd.concat([archived, df], ignore_index=True) if len(archived) else df
+
+def prepare_features(df):
+    """Resampling do 5 min i cechy modelu; zwraca (X, y) z celem CO2 za 15 min"""
     # Czyszczenie i przygotowanie danych
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     df = df.sort_values('timestamp').set_index('timestamp')
@@ -33,16 +85,154 @@ def train():
     
     df_model = df_res.dropna()
     
-    features = ['co2', 'temp', 'hum', 'hour', 'day_of_week', 'co2_trend']
-    X = df_model[features]
+    X = df_model[FEATURES]
     y = df_model['target_co2']
+    return X, y
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+def count_new_rows(db_path, since):
+    conn = sqlite3.connect(db_path)
+    table = partitions.attach_range(conn, db_path, since)
+    row = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE timestamp > ?", (since or '',)).fetchone()
+    conn.close()
+    return row[0]
+
+def recent_error(db_path, hours=DRIFT_WINDOW_HOURS):
+    """MAE predykcji zapisanych przez kolektor (pred_co2 sprzed 15 min vs. zmierzone CO2)"""
+    since = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(db_path)
+    table = partitions.attach_range(conn, db_path, since)
+    df = pd.read_sql_query(f"SELECT timestamp, co2, pred_co2 FROM {table} WHERE timestamp > ?",
+                           conn, params=(since,))
+    conn.close()
+    if df.empty:
+        return None
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp').set_index('timestamp').resample('5min').mean()
+    err = (df['pred_co2'].shift(3) - df['co2']).abs().dropna()
+    return float(err.mean()) if len(err) else None
+
+def decide(db_path, state, force=False):
+    """Zwraca ('full' | 'warm' | None, powód)"""
+    if force:
+        return 'full', "wymuszony trening"
+    if not os.path.exists(MODEL_PATH) or not state:
+        return 'full', "brak modelu"
+
+    new_rows = count_new_rows(db_path, state.get('data_until'))
+    if new_rows < MIN_NEW_ROWS:
+        return None, f"za mało nowych danych ({new_rows} < {MIN_NEW_ROWS})"
+
+    err = recent_error(db_path)
+    test_mae = state.get('test_mae')
+    if err is not None and test_mae and err > DRIFT_FACTOR * test_mae:
+        return 'full', f"dryf: MAE z ostatniej doby {err:.1f} > {DRIFT_FACTOR} x {test_mae:.1f}"
+
+    age_days = (datetime.now() - datetime.strptime(state['trained_at'], '%Y-%m-%d %H:%M:%S')).days
+    if age_days < MAX_MODEL_AGE_DAYS:
+        mae_info = f"{err:.1f}" if err is not None else "brak danych"
+        return None, f"model aktualny (MAE z ostatniej doby: {mae_info}, wiek: {age_days} d)"
+
+    if state.get('n_estimators', 0) + WARM_TREES > MAX_TREES:
+        return 'full', f"las osiągnąłby limit {MAX_TREES} drzew"
+    return 'warm', f"douczanie na {new_rows} nowych wierszach"
+
+def replace_pair(sources):
+    """Podmienia oba pliki modelu zaraz po sobie: {ścieżka docelowa: gotowy plik tymczasowy}
+
+    Wszystko, co może się nie udać (zapis, fsync, kopie .prev), dzieje się wcześniej, więc
+    .pkl i .cfr dzielą tylko dwa kolejne rename.
+    """
+    for path, tmp in sources.items():
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+    for path, tmp in sources.items():
+        os.replace(tmp, path)
+
+def publish(model):
+    """Zapis obu plików do plików tymczasowych i podmiana parą; poprzednia para zostaje jako .prev"""
+    paths = (MODEL_PATH, COMPACT_MODEL_PATH)
+    joblib.dump(model, MODEL_PATH + '.tmp')
+    compact_model.export(model, COMPACT_MODEL_PATH + '.tmp')
+    # Kopie .prev tylko kompletnej pary - inaczej rollback mieszałby wersje
+    if all(os.path.exists(path) for path in paths):
+        replace_pair({path + '.prev': shutil.copy2(path, path + '.prev.tmp') for path in paths})
+    # Kolektor czyta zawsze kompletny plik - stary albo nowy
+    replace_pair({path: path + '.tmp' for path in paths})
+
+def rollback():
+    """Przywraca poprzednią wersję modelu (.prev)"""
+    for path in (MODEL_PATH, COMPACT_MODEL_PATH):
+        prev = path + '.prev'
+        if not os.path.exists(prev):
+            print(f"Brak poprzedniej wersji: {prev}")
+            return False
+    replace_pair({path: shutil.copy2(path + '.prev', path + '.tmp') for path in (MODEL_PATH, COMPACT_MODEL_PATH)})
+    # Następny nocny trening zacznie od pełnego treningu
+    if os.path.exists(STATE_PATH):
+        os.remove(STATE_PATH)
+    print("Przywrócono poprzednią wersję modelu.")
+    return True
+
+def train(tune=False, budget_s=3600, workers=None, splits=5, force=False):
+    state = load_state()
+    mode, reason = decide(DB_PATH, state, force or tune)
+    if mode is None:
+        print(f"Pominięto trening: {reason}")
+        return
+    print(f"Trening ({'pełny' if mode == 'full' else 'douczanie'}): {reason}")
+
+    # Dane z ostatnich 14 dni (douczanie: tylko nowe dane + godzina kontekstu do trendu)
+    if mode == 'warm':
+        since = datetime.strptime(state['data_until'], '%Y-%m-%d %H:%M:%S') - timedelta(hours=1)
+        date_limit = since.strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        date_limit = (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
+    df = load_data(DB_PATH, date_limit)
+
+    if len(df) < 100: 
+        print("Zbyt mało danych do trenowania modelu.")
+        return
+
+    data_until = df['timestamp'].max()
+    X, y = prepare_features(df)
 
     # Chronologiczny podział na zbiór treningowy 80% i testowy 20%
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
+    if tune:
+        # Przeszukiwanie hiperparametrów na foldach TimeSeriesSplit w puli procesów - tylko na części
+        # treningowej, żeby wynik na zbiorze testowym nie był zawyżony przez wybór parametrów
+        from tuning import search
+        params, cv_rmse, evaluated = search(X_train, y_train, splits, budget_s, workers)
+        if params is None:
+            print("Brak wyników strojenia - użyte zostaną dotychczasowe parametry.")
+        else:
+            save_params(params, cv_rmse, evaluated)
+            print(f"Najlepsze parametry ({evaluated} ocen, CV RMSE {cv_rmse:.2f}): {params}")
+
     # Trening modelu
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    if mode == 'warm':
+        # Dotychczasowe drzewa zostają, dochodzą nowe wytrenowane na nowych danych
+        model = joblib.load(MODEL_PATH)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + WARM_TREES)
+    else:
+        model = RandomForestRegressor(random_state=42, **load_params())
     model.fit(X_train, y_train)
+    model.set_params(warm_start=False)
     
     # Ewaluacja modelu na zbiorze testowym
     predictions = model.predict(X_test)
@@ -51,12 +241,18 @@ def train():
     rmse = np.sqrt(mean_squared_error(y_test, predictions))
     r2 = r2_score(y_test, predictions)
     
-    # Zapisanie modelu
-    model_path = '/home/michal/Projekt_App/co2_model.pkl'
-    joblib.dump(model, model_path)
+    # Zapisanie modelu (atomowo, z kopią poprzedniej wersji)
+    publish(model)
     
     # Logowanie wyników do pliku CSV
     log_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    save_state({
+        'trained_at': log_time,
+        'data_until': data_until,
+        'mode': mode,
+        'n_estimators': len(model.estimators_),
+        'test_mae': round(mae, 2),
+    })
     log_entry = pd.DataFrame([{
         'timestamp': log_time,
         'train_size': len(X_train),
@@ -73,4 +269,15 @@ def train():
     print(f"Model wytrenowany: {log_time} | MAE: {mae:.2f} | RMSE: {rmse:.2f} | R2: {r2:.4f}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Trening modelu predykcji CO2")
+    parser.add_argument('--tune', action='store_true', help="strojenie hiperparametrów przed treningiem")
+    parser.add_argument('--budget', type=int, default=3600, help="limit czasu strojenia w sekundach")
+    parser.add_argument('--workers', type=int, default=None, help="liczba procesów (domyślnie wszystkie rdzenie)")
+    parser.add_argument('--splits', type=int, default=5, help="liczba foldów TimeSeriesSplit")
+    parser.add_argument('--force', action='store_true', help="pełny trening bez sprawdzania, czy jest potrzebny")
+    parser.add_argument('--rollback', action='store_true', help="przywróć poprzednią wersję modelu")
+    args = parser.parse_args()
+    if args.rollback:
+        rollback()
+    else:
+        train(args.tune, args.budget, args.workers, args.splits, args.force)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import time
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import mean_squared_error
+
+# Przestrzeń przeszukiwania RandomForestRegressor
+PARAM_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 8, 12, 20],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': [1.0, 0.7, 0.5, 'sqrt'],
+}
+
+# Dane współdzielone w procesie roboczym - przekazywane raz, przy starcie procesu
+_X = _y = _folds = None
+
+
+def _init_worker(X, y, folds):
+    global _X, _y, _folds
+    _X, _y, _folds = X, y, folds
+
+
+def _evaluate(params):
+    """Średnie RMSE kandydata na wszystkich foldach (w procesie roboczym)"""
+    rmses = []
+    for train_idx, test_idx in _folds:
+        model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+        model.fit(_X[train_idx], _y[train_idx])
+        rmses.append(np.sqrt(mean_squared_error(_y[test_idx], model.predict(_X[test_idx]))))
+    return params, float(np.mean(rmses))
+
+
+def candidates(seed=42):
+    """Wszystkie kombinacje parametrów w losowej kolejności"""
+    grid = [{}]
+    for name, values in PARAM_SPACE.items():
+        grid = [dict(c, **{name: v}) for c in grid for v in values]
+    random.Random(seed).shuffle(grid)
+    return grid
+
+
+def search(X, y, splits=5, budget_s=3600, workers=None):
+    """Losowe przeszukiwanie w puli procesów z limitem czasu; zwraca (najlepsze parametry, RMSE, liczba ocen)"""
+    # Macierz cech i indeksy foldów liczone raz dla wszystkich kandydatów
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    folds = list(TimeSeriesSplit(n_splits=splits).split(X))
+    workers = workers or os.cpu_count() or 1
+
+    deadline = time.monotonic() + budget_s
+    queue = candidates()
+    best_params, best_rmse, evaluated = None, float('inf'), 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, folds)) as pool:
+        running = set()
+        while queue or running:
+            # Nowe zadania tylko, dopóki nie minął limit czasu
+            while queue and len(running) < workers and time.monotonic() < deadline:
+                running.add(pool.submit(_evaluate, queue.pop()))
+            if not running:
+                break
+
+            # Po limicie czasu trwające oceny są jeszcze dokończone (najwyżej jedna runda)
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                params, rmse = future.result()
+                evaluated += 1
+                print(f"[{evaluated}] RMSE {rmse:.2f} | {params}")
+                if rmse < best_rmse:
+                    best_params, best_rmse = params, rmse
+
+    return best_params, best_rmse, evaluated
@@ -0,0 +1,244 @@
+import os
+import gzip
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import urllib.request
+
+import partitions
+
+# Konfiguracja stacji (wysyłanie jest domyślnie wyłączone)
+UPLINK_URL = os.environ.get('UPLINK_URL', '')  # np. http://serwer:5000/api/ingest
+STATION_ID = os.environ.get('STATION_ID', socket.gethostname())
+UPLINK_STATE = os.environ.get('UPLINK_STATE', 'uplink_state.json')  # kursor ostatniej potwierdzonej paczki
+UPLINK_BATCH = 500        # wierszy w jednej paczce
+UPLINK_INTERVAL_S = 60    # odstęp między wysyłkami, gdy nie ma zaległości
+UPLINK_MAX_BACKOFF_S = 900
+
+# Konfiguracja serwera centralnego
+INGEST_TOKEN = os.environ.get('INGEST_TOKEN', '')  # wspólny sekret stacji i serwera (opcjonalny)
+
+COLUMNS = ['timestamp', 'temp', 'hum', 'co2', 'pm10', 'pm25', 'pm100', 'voc', 'iaq', 'pred_co2', 'iaq_version']
+
+
+def load_cursor(path=UPLINK_STATE):
+    """(ostatni potwierdzony rowid, partycja 'RRRR_MM' albo None, czas ostatniego wysłanego wiersza)"""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        return state['last_id'], state.get('partition'), state.get('last_ts')
+    except (OSError, ValueError, KeyError):
+        return 0, None, None
+
+
+def save_cursor(last_id, partition=None, path=UPLINK_STATE, last_ts=None):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'last_id': last_id, 'partition': partition, 'last_ts': last_ts,
+                   'saved_at': time.strftime('%Y-%m-%d %H:%M:%S')}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_batch(conn, after_id, limit=UPLINK_BATCH):
+    """Kolejne wiersze readings po rowid > after_id - tabela jest trwałą skrzynką nadawczą"""
+    return conn.execute(f'SELECT rowid, {", ".join(COLUMNS)} FROM readings WHERE rowid > ? '
+                        f'ORDER BY rowid LIMIT ?', (after_id, limit)).fetchall()
+
+
+def seq_base(partition):
+    """Przesunięcie numerów wierszy partycji - rowid są liczone w każdym pliku od 1"""
+    return int(partition.replace('_', '')) * 10 ** 10 if partition else 0
+
+
+def encode_batch(station_id, rows, base=0):
+    """Paczka JSON (kolumny + wiersze, bez powtarzania nazw) skompresowana gzip"""
+    payload = {
+        'station_id': station_id,
+        'columns': ['seq'] + COLUMNS,
+        'rows': [[base + r[0], *r[1:]] for r in rows],
+    }
+    return gzip.compress(json.dumps(payload, separators=(',', ':')).encode(), compresslevel=6)
+
+
+def post_batch(url, body, timeout=30):
+    """Wysyła paczkę; zwraca liczbę wierszy potwierdzonych przez serwer"""
+    headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+    if INGEST_TOKEN:
+        headers['X-Ingest-Token'] = INGEST_TOKEN
+    req = urllib.request.Request(url, data=body, headers=headers, method='POST')
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())['received']
+
+
+class Uplink:
+    """Wątek wysyłający nowe pomiary na serwer centralny paczkami, z wznowieniem od kursora"""
+
+    def __init__(self, url=UPLINK_URL, station_id=STATION_ID, db_path='sensors.db',
+                 state_path=UPLINK_STATE, batch=UPLINK_BATCH, interval_s=UPLINK_INTERVAL_S):
+        self.url = url
+        self.station_id = station_id
+        self.db_path = db_path
+        self.state_path = state_path
+        self.batch = batch
+        self.interval_s = interval_s
+        self.last_id, self.partition, self.last_ts = load_cursor(state_path)
+        if partitions.PARTITIONED and self.partition is None and self.last_id and self.last_ts is None:
+            self.last_ts = self.main_timestamp(self.last_id)
+        self.backoff_s = interval_s
+
+    def start(self):
+        threading.Thread(target=self._worker, daemon=True).start()
+        print(f"Uplink aktywny: stacja {self.station_id} -> {self.url} "
+              f"(od rowid {self.last_id}{f' w {self.partition}' if self.partition else ''})")
+
+    def main_timestamp(self, rowid):
+        """Czas wiersza z kursora sprzed przejścia na partycje (kursor bez last_ts)"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT timestamp FROM readings WHERE rowid = ?', (rowid,)).fetchone()
+        conn.close()
+        if row is None:
+            # Wiersz przeniesiony już przez partitions.py split - nie wiadomo, co wysłano
+            print(f"Uplink: brak wiersza {rowid} w sensors.db - partycje zostaną wysłane od początku "
+                  f"(serwer może dostać duplikaty)")
+        return row[0] if row else None
+
+    def source(self):
+        """Plik z bieżącą skrzynką nadawczą: sensors.db albo partycja miesiąca
+
+        Bez partycji w kursorze najpierw wysyłane są zaległe wiersze z sensors.db.
+        """
+        if partitions.PARTITIONED and self.partition:
+            return partitions.partition_path(self.db_path, self.partition)
+        return self.db_path
+
+    def next_partition(self):
+        """Po wysłaniu całej partycji - przejście do następnej, jeśli już istnieje"""
+        if not partitions.PARTITIONED:
+            return False
+        later = [m for m in partitions.list_months(self.db_path) if self.partition is None or m > self.partition]
+        migrating = self.partition is None and self.last_ts
+        if migrating:
+            # Przejście z sensors.db: partitions.py split przeniósł tam także wysłane już wiersze -
+            # pomijamy miesiące i wiersze do czasu ostatniego wysłanego
+            later = [m for m in later if m >= partitions.month_of(self.last_ts)]
+        if not later:
+            return False
+        self.partition, self.last_id = later[0], 0
+        if migrating:
+            conn = sqlite3.connect(self.source())
+            self.last_id = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM readings WHERE timestamp <= ?',
+                                        (self.last_ts,)).fetchone()[0]
+            conn.close()
+        save_cursor(self.last_id, self.partition, self.state_path, self.last_ts)
+        return True
+
+    def send_pending(self, conn):
+        """Wysyła jedną paczkę; zwraca liczbę wysłanych wierszy (0 = brak zaległości)"""
+        rows = read_batch(conn, self.last_id, self.batch)
+        if not rows:
+            return 0
+        received = post_batch(self.url, encode_batch(self.station_id, rows, seq_base(self.partition)))
+        if received != len(rows):
+            raise IOError(f"serwer potwierdził {received} z {len(rows)} wierszy")
+        # Kursor przesuwany dopiero po potwierdzeniu - po awarii paczka jest wysyłana ponownie,
+        # a serwer pomija duplikaty (station_id, seq)
+        self.last_id, self.last_ts = rows[-1][0], rows[-1][1]
+        save_cursor(self.last_id, self.partition, self.state_path, self.last_ts)
+        return len(rows)
+
+    def drain(self):
+        """Wysyła wszystkie zaległe paczki (z kolejnych partycji, jeśli są)"""
+        total = 0
+        while True:
+            conn = sqlite3.connect(self.source())
+            try:
+                while True:
+                    sent = self.send_pending(conn)
+                    total += sent
+                    if sent < self.batch:
+                        break
+            finally:
+                conn.close()
+            if not self.next_partition():
+                return total
+
+    def _worker(self):
+        while True:
+            try:
+                sent = self.drain()
+                if sent:
+                    print(f"Uplink: wysłano {sent} wierszy (do rowid {self.last_id})")
+                self.backoff_s = self.interval_s
+            except Exception as e:
+                # Brak sieci/serwera: dane czekają w bazie, kolejna próba z wydłużonym odstępem
+                print(f"Uplink: błąd wysyłki ({e}), ponowienie za {self.backoff_s} s")
+                time.sleep(self.backoff_s)
+                self.backoff_s = min(self.backoff_s * 2, UPLINK_MAX_BACKOFF_S)
+                continue
+            time.sleep(self.interval_s)
+
+
+# --- Strona serwera centralnego ---
+
+def ensure_station_table(conn):
+    """Tabela pomiarów ze wszystkich stacji; (station_id, seq) chroni przed duplikatami"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS station_readings
+                    (station_id TEXT NOT NULL, seq INTEGER NOT NULL,
+                     timestamp DATETIME, temp REAL, hum REAL, co2 INTEGER,
+                     pm10 REAL, pm25 REAL, pm100 REAL,
+                     voc REAL, iaq REAL, pred_co2 REAL, iaq_version INTEGER,
+                     PRIMARY KEY (station_id, seq))''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_station_readings_time
+                    ON station_readings (station_id, timestamp)''')
+
+
+def decode_batch(body, encoding=None):
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get('station_id'), str) or not payload['station_id']:
+        raise ValueError("nieprawidłowa paczka (station_id)")
+    if payload.get('columns') != ['seq'] + COLUMNS:
+        raise ValueError("nieprawidłowa paczka (kolumny)")
+    rows = payload.get('rows')
+    if not isinstance(rows, list):
+        raise ValueError("nieprawidłowa paczka (rows)")
+    for i, row in enumerate(rows):
+        # seq, timestamp i liczby (albo null) - sprawdzane przed zapisem, żeby executemany nie zawiódł w połowie
+        if (not isinstance(row, list) or len(row) != len(COLUMNS) + 1
+                or not isinstance(row[0], int) or isinstance(row[0], bool)
+                or not isinstance(row[1], str)
+                or not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in row[2:])):
+            raise ValueError(f"nieprawidłowy wiersz {i}")
+    return payload
+
+
+def store_batch(conn, payload):
+    """Wstawienie paczki jednym executemany w jednej transakcji; zwraca liczbę odebranych wierszy"""
+    station_id = payload['station_id']
+    rows = [(station_id, *row) for row in payload['rows']]
+    with conn:
+        ensure_station_table(conn)
+        conn.executemany(f'''INSERT OR IGNORE INTO station_readings (station_id, seq, {", ".join(COLUMNS)})
+                             VALUES ({", ".join("?" * (len(COLUMNS) + 2))})''', rows)
+    return len(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Jednorazowe wysłanie zaległych pomiarów na serwer centralny")
+    parser.add_argument('--db', default='sensors.db')
+    parser.add_argument('--url', default=UPLINK_URL or 'http://127.0.0.1:5000/api/ingest')
+    parser.add_argument('--station', default=STATION_ID)
+    parser.add_argument('--state', default=UPLINK_STATE)
+    parser.add_argument('--batch', type=int, default=UPLINK_BATCH)
+    args = parser.parse_args()
+
+    uplink = Uplink(args.url, args.station, args.db, args.state, args.batch)
+    start = time.perf_counter()
+    sent = uplink.drain()
+    print(f"Wysłano {sent} wierszy w {time.perf_counter() - start:.1f} s (kursor: rowid {uplink.last_id})")
@@ -4,6 +4,7 @@ import os
 import csv
 import bme680
 from datetime import datetime
+from gas_baseline import GasBaseline
 
 print("""
 BME680 – Odczyt wszystkich danych + Indoor Air Quality + CSV + Fullscreen
@@ -36,26 +37,38 @@ with open(csv_filename, "a", newline="") as f:
         writer.writerow(["timestamp", "temperature", "pressure", "humidity",
                          "gas_resistance", "air_quality"])
 
-# --- IAQ INITIAL BURN-IN ---
-print("Zbieranie danych burn-in przez 5 minut.\n")
+# --- GAS BASELINE ---
+# Zapisany baseline z poprzedniego uruchomienia pozwala pominąć burn-in
+baseline = GasBaseline()
 
-start_time = time.time()
-burn_in_time = 300
-burn_in_data = []
+if baseline.load() is not None:
+    print(f"Wczytano zapisany gas baseline: {baseline.value:.2f} Ohms - pomijam burn-in.\n")
+else:
+    # --- IAQ INITIAL BURN-IN ---
+    print("Zbieranie danych burn-in przez 5 minut.\n")
 
-while time.time() - start_time < burn_in_time:
-    if sensor.get_sensor_data() and sensor.data.heat_stable:
-        gas = sensor.data.gas_resistance
-        burn_in_data.append(gas)
-        print(f"Gas: {gas:.2f} Ohms")
-        time.sleep(1)
+    start_time = time.time()
+    burn_in_time = 300
+    burn_in_data = []
+
+    while time.time() - start_time < burn_in_time:
+        if sensor.get_sensor_data() and sensor.data.heat_stable:
+            gas = sensor.data.gas_resistance
+            burn_in_data.append(gas)
+            print(f"Gas: {gas:.2f} Ohms")
+            time.sleep(1)
+
+    baseline.seed(burn_in_data[-50:])
+    print("\nBurn-in zakończone!")
 
-gas_baseline = sum(burn_in_data[-50:]) / 50
+gas_baseline = baseline.value
 hum_baseline = 40.0
 hum_weighting = 0.25
 
-print("\nBurn-in zakończone!")
-print(f"Gas baseline: {gas_baseline:.2f} Ohms, humidity baseline: {hum_baseline}%RH\n")
+if gas_baseline is not None:
+    print(f"Gas baseline: {gas_baseline:.2f} Ohms, humidity baseline: {hum_baseline}%RH\n")
+else:
+    print(f"Gas baseline: z pierwszego pomiaru, humidity baseline: {hum_baseline}%RH\n")
 
 # --- MAIN LOOP ---
 try:
@@ -66,6 +79,9 @@ try:
             hum = sensor.data.humidity
             gas = sensor.data.gas_resistance
 
+            # Baseline doprecyzowywany na bieżąco
+            gas_baseline = baseline.update(gas)
+
             # AIR QUALITY CALC
             gas_offset = gas_baseline - gas
             hum_offset = hum - hum_baseline
@@ -113,5 +129,6 @@ try:
         time.sleep(1)
 
 except KeyboardInterrupt:
+    baseline.save()
     print("\nZakończono.")
     pass
@@ -1,53 +1,17 @@
 #!/usr/bin/env python3
 import time
 import os
+import sys
 import csv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import bme680
-from smbus2 import SMBus, i2c_msg
 from pms5003 import PMS5003
+from gas_baseline import GasBaseline
 
-# --- SHT40 ---
-SHT40_ADDR = 0x44
-MEASURE_HIGH_PRECISION = 0xFD
-
-def read_sht40(bus):
-    # Wyślij komendę pomiaru
-    write = i2c_msg.write(SHT40_ADDR, [MEASURE_HIGH_PRECISION])
-    bus.i2c_rdwr(write)
-
-    time.sleep(0.02)  # czas konwersji
-
-    # Odczytaj 6 bajtów (T, crc, RH, crc)
-    read = i2c_msg.read(SHT40_ADDR, 6)
-    bus.i2c_rdwr(read)
-
-    data = list(read)
-
-    temp_raw = data[0] << 8 | data[1]
-    hum_raw  = data[3] << 8 | data[4]
-
-    temperature = -45 + 175 * (temp_raw / 65535.0)
-    humidity = -6 + 125 * (hum_raw / 65535.0)
-
-    return temperature, humidity
-
-# --- KONFIGURACJA SCD41 ---
-SCD41_ADDR = 0x62
-
-def write_command(bus, cmd, delay=0):
-    msg = i2c_msg.write(SCD41_ADDR, cmd)
-    bus.i2c_rdwr(msg)
-    if delay > 0:
-        time.sleep(delay)
-
-def read_data(bus, length=9):
-    read = i2c_msg.read(SCD41_ADDR, length)
-    bus.i2c_rdwr(read)
-    return list(read)
-
-def parse_value(msb, lsb):
-    return (msb << 8) | lsb
+# Wspólny sterownik I2C dla czujników Sensirion (z weryfikacją CRC)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Projekt_App"))
+from sensirion import SensirionBus, SHT40, SCD41
 
 # --- INICJALIZACJA BME680 ---
 try:
@@ -64,12 +28,19 @@ sensor.set_gas_heater_temperature(320)
 sensor.set_gas_heater_duration(150)
 sensor.select_gas_heater_profile(0)
 
-# --- INICJALIZACJA I2C ---
-bus = SMBus(1)
+# --- GAS BASELINE (zapisany z poprzedniego uruchomienia albo wartość startowa) ---
+baseline = GasBaseline()
+if baseline.load() is None:
+    baseline.value = 100000
+
+# --- INICJALIZACJA I2C (jeden uchwyt magistrali dla wszystkich czujników) ---
+bus = SensirionBus(1)
+sht40 = SHT40(bus)
+scd41 = SCD41(bus)
 
 # --- INICJALIZACJA SCD41 ---
-write_command(bus, [0x3F, 0x86], 0.5)  # stop_periodic_measurement
-write_command(bus, [0x21, 0xB1], 0.5)  # start_periodic_measurement
+scd41.stop_periodic_measurement()
+scd41.start_periodic_measurement()
 time.sleep(5)
 
 # --- INICJALIZACJA PMS5003 ---
@@ -92,69 +63,87 @@ with open(csv_filename, "a", newline="") as f:
             "PM1.0", "PM2.5", "PM10"
         ])
 last_csv_write = 0
+
+# Czujniki czytane jednocześnie: BME680 (grzałka 150 ms), Sensirion (konwersje SHT40) i PMS5003 (UART).
+# Bezpieczne, bo nie ma tu sterowników Adafruit/Blinka: Sensirion idzie przez sensirion.py (blokada
+# tylko na czas transakcji), a BME680 ma własny uchwyt SMBus (jądro szereguje transakcje magistrali).
+CONCURRENT_READS = os.environ.get('CONCURRENT_READS', '1') == '1'
+pool = ThreadPoolExecutor(max_workers=3)
+
+
+def read_bme():
+    if not (sensor.get_sensor_data() and sensor.data.heat_stable):
+        return None, None, None, None, None
+
+    bme_temp = sensor.data.temperature
+    bme_pres = sensor.data.pressure
+    bme_hum = sensor.data.humidity
+    bme_gas = sensor.data.gas_resistance
+
+    hum_baseline = 40.0
+    gas_baseline = baseline.update(bme_gas)
+    hum_weighting = 0.25
+
+    gas_offset = gas_baseline - bme_gas
+    hum_offset = bme_hum - hum_baseline
+
+    if hum_offset > 0:
+        hum_score = (100 - hum_baseline - hum_offset) / (100 - hum_baseline) * (hum_weighting * 100)
+    else:
+        hum_score = (hum_baseline + hum_offset) / hum_baseline * (hum_weighting * 100)
+
+    if gas_offset > 0:
+        gas_score = (bme_gas / gas_baseline) * (100 - (hum_weighting * 100))
+    else:
+        gas_score = 100 - (hum_weighting * 100)
+
+    return bme_temp, bme_pres, bme_hum, bme_gas, hum_score + gas_score
+
+
+def read_sensirion():
+    # SCD41 (pomiar okresowy) odczytywany w trakcie konwersji SHT40 - magistrala jest wolna
+    sht_future = pool.submit(lambda: sht40.measurements) if CONCURRENT_READS else None
+    try:
+        scd_co2, scd_temp, scd_hum = scd41.read_measurement()
+    except Exception:
+        scd_co2 = scd_temp = scd_hum = None
+
+    try:
+        sht_temp, sht_hum = sht_future.result() if sht_future else sht40.measurements
+    except Exception:
+        sht_temp = sht_hum = None
+    return scd_co2, scd_temp, scd_hum, sht_temp, sht_hum
+
+
+def read_pms():
+    try:
+        readings = pms5003.read()
+        return readings.pm_ug_per_m3(1.0), readings.pm_ug_per_m3(2.5), readings.pm_ug_per_m3(10)
+    except Exception as e:
+        print(f"Błąd PMS5003: {e}")
+        pms5003.reset()
+        return None, None, None
+
+
 # --- GŁÓWNA PĘTLA ---
 try:
     while True:
-        # --- BME680 ---
-        if sensor.get_sensor_data() and sensor.data.heat_stable:
-            bme_temp = sensor.data.temperature
-            bme_pres = sensor.data.pressure
-            bme_hum = sensor.data.humidity
-            bme_gas = sensor.data.gas_resistance
-
-            hum_baseline = 40.0
-            gas_baseline = 100000
-            hum_weighting = 0.25
-
-            gas_offset = gas_baseline - bme_gas
-            hum_offset = bme_hum - hum_baseline
-
-            if hum_offset > 0:
-                hum_score = (100 - hum_baseline - hum_offset) / (100 - hum_baseline) * (hum_weighting * 100)
-            else:
-                hum_score = (hum_baseline + hum_offset) / hum_baseline * (hum_weighting * 100)
-
-            if gas_offset > 0:
-                gas_score = (bme_gas / gas_baseline) * (100 - (hum_weighting * 100))
-            else:
-                gas_score = 100 - (hum_weighting * 100)
-
-            bme_iaq = hum_score + gas_score
+        start = time.perf_counter()
+        if CONCURRENT_READS:
+            bme, pms = pool.submit(read_bme), pool.submit(read_pms)
+            scd_co2, scd_temp, scd_hum, sht_temp, sht_hum = read_sensirion()
+            bme_temp, bme_pres, bme_hum, bme_gas, bme_iaq = bme.result()
+            pm1, pm2_5, pm10 = pms.result()
         else:
-            bme_temp = bme_pres = bme_hum = bme_gas = bme_iaq = None
-
-        # --- SCD41 ---
-        try:
-            write_command(bus, [0xEC, 0x05])
-            data = read_data(bus)
-            scd_co2 = parse_value(data[0], data[1])
-            temp_raw = parse_value(data[3], data[4])
-            hum_raw = parse_value(data[6], data[7])
-            scd_temp = -45 + 175 * (temp_raw / 65535.0)
-            scd_hum = 100 * (hum_raw / 65535.0)
-        except Exception:
-            scd_co2 = scd_temp = scd_hum = None
-
-        # --- SHT40 ---
-        try:
-            sht_temp, sht_hum = read_sht40(bus)
-        except Exception:
-            sht_temp = sht_hum = None
-
-        # --- PMS5003 ---
-        try:
-            readings = pms5003.read()
-            pm1 = readings.pm_ug_per_m3(1.0)
-            pm2_5 = readings.pm_ug_per_m3(2.5)
-            pm10 = readings.pm_ug_per_m3(10)
-        except Exception as e:
-            print(f"Błąd PMS5003: {e}")
-            pms5003.reset()
-            pm1 = pm2_5 = pm10 = None
+            bme_temp, bme_pres, bme_hum, bme_gas, bme_iaq = read_bme()
+            scd_co2, scd_temp, scd_hum, sht_temp, sht_hum = read_sensirion()
+            pm1, pm2_5, pm10 = read_pms()
+        read_ms = (time.perf_counter() - start) * 1000
 
         # --- EKRAN ---
         os.system("clear")
         print("=== LIVE DATA ===\n")
+        print(f"Czas odczytu czujników: {read_ms:.0f} ms ({'równolegle' if CONCURRENT_READS else 'po kolei'})\n")
 
         print(f"BME680 -> Temp: {bme_temp:.2f} °C" if bme_temp is not None else "BME680 -> Temp: N/A")
         print(f"          Pres: {bme_pres:.2f} hPa" if bme_pres is not None else "          Pres: N/A")
@@ -189,6 +178,7 @@ try:
         time.sleep(5)
 
 except KeyboardInterrupt:
+    baseline.save()
     print("\nZakończono pomiary.")
 
 
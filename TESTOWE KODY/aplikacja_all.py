@@ -2,6 +2,8 @@
 import tkinter as tk
 from tkinter import font
 import time
+import queue
+import threading
 from pms5003 import PMS5003, ReadTimeoutError
 import bme680
 
@@ -18,6 +20,11 @@ class PmsMonitorApp(tk.Tk):
 
         # Przechowuje dane wyświetlane w kafelkach
         self.value_vars = {}
+        # Ostatnio wyświetlony tekst - kafelek odświeżany tylko przy zmianie
+        self.shown = {}
+
+        # Odczyty z wątków czujników trafiają do kolejki, GUI ją opróżnia
+        self.readings = queue.Queue()
 
         # Inicjalizacja czujników
         self.pms5003 = self.initialize_pms()
@@ -26,7 +33,13 @@ class PmsMonitorApp(tk.Tk):
         # Tworzenie kafelków
         self.create_widgets()
 
-        # Start pętli pomiarowej
+        # Wątki pomiarowe (odczyty nie blokują wątku GUI)
+        if self.pms5003:
+            threading.Thread(target=self.pms_worker, daemon=True).start()
+        if self.bme680:
+            threading.Thread(target=self.bme_worker, daemon=True).start()
+
+        # Start pętli odświeżania GUI
         self.update_readings()
 
     # -------------------------------
@@ -101,38 +114,62 @@ class PmsMonitorApp(tk.Tk):
             tk.Label(tile, text=unit, font=unit_font, bg="#3C3C3C", fg="white").pack(pady=(0, 10))
 
     # -------------------------------
-    #   ODCZYT SENSORÓW
+    #   WĄTKI CZUJNIKÓW
     # -------------------------------
-    def update_readings(self):
-
-        # --- PMS5003 ---
-        if self.pms5003:
+    def pms_worker(self):
+        # read() czeka na ramkę z portu szeregowego - blokuje tylko ten wątek
+        while True:
             try:
                 r = self.pms5003.read()
-                self.value_vars["pm1"].set(f"{r.pm_ug_per_m3(1.0):.1f}")
-                self.value_vars["pm25"].set(f"{r.pm_ug_per_m3(2.5):.1f}")
-                self.value_vars["pm10"].set(f"{r.pm_ug_per_m3(10):.1f}")
-            except:
-                self.value_vars["pm1"].set("--")
-                self.value_vars["pm25"].set("--")
-                self.value_vars["pm10"].set("--")
-
-        # --- BME680 ---
-        if self.bme680 and self.bme680.get_sensor_data():
-            temp = self.bme680.data.temperature
-            hum = self.bme680.data.humidity
-            press = self.bme680.data.pressure
-            gas = self.bme680.data.gas_resistance
-
-            self.value_vars["temp"].set(f"{temp:.1f}")
-            self.value_vars["hum"].set(f"{hum:.1f}")
-            self.value_vars["press"].set(f"{press:.1f}")
-
-            # Obliczenie jakości powietrza (prosta wersja)
-            aq = min(100, max(0, (gas / 50000) * 100))
-            self.value_vars["aq"].set(f"{aq:.1f}")
-
-        self.after(1500, self.update_readings)
+                self.readings.put({
+                    "pm1": f"{r.pm_ug_per_m3(1.0):.1f}",
+                    "pm25": f"{r.pm_ug_per_m3(2.5):.1f}",
+                    "pm10": f"{r.pm_ug_per_m3(10):.1f}",
+                })
+            except Exception:
+                self.readings.put({"pm1": "--", "pm25": "--", "pm10": "--"})
+                time.sleep(1.5)
+
+    def bme_worker(self):
+        while True:
+            try:
+                if self.bme680.get_sensor_data():
+                    temp = self.bme680.data.temperature
+                    hum = self.bme680.data.humidity
+                    press = self.bme680.data.pressure
+                    gas = self.bme680.data.gas_resistance
+
+                    # Obliczenie jakości powietrza (prosta wersja)
+                    aq = min(100, max(0, (gas / 50000) * 100))
+
+                    self.readings.put({
+                        "temp": f"{temp:.1f}",
+                        "hum": f"{hum:.1f}",
+                        "press": f"{press:.1f}",
+                        "aq": f"{aq:.1f}",
+                    })
+            except Exception as e:
+                print("Błąd BME680:", e)
+            time.sleep(1.5)
+
+    # -------------------------------
+    #   ODŚWIEŻANIE KAFELKÓW
+    # -------------------------------
+    def update_readings(self):
+        # Tylko najnowsza wartość każdego kafelka z kolejki
+        latest = {}
+        while True:
+            try:
+                latest.update(self.readings.get_nowait())
+            except queue.Empty:
+                break
+
+        for key, text in latest.items():
+            if self.shown.get(key) != text:
+                self.shown[key] = text
+                self.value_vars[key].set(text)
+
+        self.after(200, self.update_readings)
 
 # -------------------------------
 #   START APLIKACJI
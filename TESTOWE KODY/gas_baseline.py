@@ -0,0 +1,67 @@
+import os
+import json
+import time
+
+# Konfiguracja
+BASELINE_FILE = "gas_baseline.json"
+MAX_AGE_DAYS = 7       # starszy zapisany baseline jest ignorowany (czujnik mógł się zmienić)
+ALPHA_UP = 0.05        # szybkie podążanie w górę - wysoka oporność = czyste powietrze
+ALPHA_DOWN = 0.0005    # bardzo wolne opadanie - zanieczyszczenie nie obniża baseline'u
+SAVE_EVERY = 60        # zapis do pliku co tyle aktualizacji
+
+
+class GasBaseline:
+    """Baseline oporności gazu BME680 zapisywany między uruchomieniami i aktualizowany na bieżąco"""
+
+    def __init__(self, path=BASELINE_FILE):
+        self.path = path
+        self.value = None
+        self.updates = 0
+
+    def load(self):
+        """Wczytuje zapisany baseline; zwraca wartość albo None"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if time.time() - data["updated"] > MAX_AGE_DAYS * 86400:
+                print("Zapisany baseline jest zbyt stary - potrzebny nowy burn-in")
+                return None
+            self.value = float(data["baseline"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return self.value
+
+    def seed(self, samples):
+        """Ustawia baseline ze średniej próbek burn-in; zwraca wartość albo None
+
+        Bez próbek (np. grzałka nie ustabilizowała się w czasie burn-in) zostaje dotychczasowa
+        wartość - jeśli jej nie ma, baseline ustawi pierwsza próbka w update().
+        """
+        if not samples:
+            print("Brak próbek burn-in - baseline bez zmian")
+            return self.value
+        self.value = sum(samples) / len(samples)
+        self.save()
+        return self.value
+
+    def update(self, gas):
+        """Aktualizacja przyrostowa (asymetryczna EWMA), O(1) na próbkę"""
+        if self.value is None:
+            self.value = gas
+        else:
+            alpha = ALPHA_UP if gas > self.value else ALPHA_DOWN
+            self.value += alpha * (gas - self.value)
+
+        self.updates += 1
+        if self.updates % SAVE_EVERY == 0:
+            self.save()
+        return self.value
+
+    def save(self):
+        """Zapis atomowy (plik tymczasowy + rename)"""
+        if self.value is None:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"baseline": self.value, "updated": time.time()}, f)
+        os.replace(tmp, self.path)
@@ -1,38 +1,24 @@
+import os
+import sys
 import time
 import csv
 from datetime import datetime
-from smbus2 import SMBus, i2c_msg
-from scd4x import SCD4X
 from pms5003 import PMS5003
 from bme680 import BME680
 
+# Wspólny sterownik I2C dla czujników Sensirion (z weryfikacją CRC)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Projekt_App"))
+from sensirion import SensirionBus, SHT40, SCD41
+
 # -------------------------
-#  SHT40 - konfiguracja
+#  Magistrala I2C - jeden uchwyt na cały program
 # -------------------------
-SHT40_ADDR = 0x44
-MEASURE_HIGH_PRECISION = 0xFD
-
-def read_sht40():
-    with SMBus(1) as bus:
-        # Wyślij komendę pomiaru
-        write = i2c_msg.write(SHT40_ADDR, [MEASURE_HIGH_PRECISION])
-        bus.i2c_rdwr(write)
-
-        time.sleep(0.02)  # czas konwersji sensora
-
-        # Odczytaj 6 bajtów
-        read = i2c_msg.read(SHT40_ADDR, 6)
-        bus.i2c_rdwr(read)
-
-        data = list(read)
+bus = SensirionBus(1)
 
-        temp_raw = (data[0] << 8) | data[1]
-        hum_raw = (data[3] << 8) | data[4]
-
-        temperature = -45 + (175 * (temp_raw / 65535.0))
-        humidity = -6 + (125 * (hum_raw / 65535.0))
-
-        return temperature, humidity
+# -------------------------
+#  SHT40 - konfiguracja
+# -------------------------
+sht40 = SHT40(bus)
 
 
 # -------------------------
@@ -44,8 +30,10 @@ pms = PMS5003()
 # -------------------------
 # SCD41 – CO₂
 # -------------------------
-scd41 = SCD4X()
+scd41 = SCD41(bus)
 scd41.start_periodic_measurement()
+time.sleep(5)  # pierwszy pomiar okresowy
+co2 = scd_temp = scd_hum = None
 
 
 # -------------------------
@@ -98,10 +86,11 @@ while True:
             bme_temp = bme_pres = bme_hum = bme_gas = bme_iaq = None
 
         # ----- SCD41 -----
-        co2, scd_temp, scd_hum = scd41.read_measurement()
+        if scd41.data_ready:
+            co2, scd_temp, scd_hum = scd41.read_measurement()
 
         # ----- SHT40 -----
-        sht_temp, sht_hum = read_sht40()
+        sht_temp, sht_hum = sht40.measurements
 
         # ----- PMS5003 -----
         data = pms.read()
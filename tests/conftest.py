@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Moduły aplikacji leżą płasko w Projekt_App (jak przy uruchamianiu z tego katalogu)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Projekt_App'))
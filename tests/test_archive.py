@@ -0,0 +1,90 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import archive
+import partitions
+
+
+def fill(path, day, n=50):
+    partitions.ensure_partition(path)
+    t0 = datetime.strptime(day, '%Y-%m-%d')
+    rows = [((t0 + timedelta(seconds=10 * i)).strftime('%Y-%m-%d %H:%M:%S'), 21.5, 40.0, 500 + i,
+             1.0, 2.0, 3.0, 100.0, 50.0, 510.0 + i, 2) for i in range(n)]
+    conn = sqlite3.connect(path)
+    conn.executemany(f'INSERT INTO readings ({partitions.COLUMNS}) VALUES ({", ".join("?" * 11)})', rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def test_build_more_months_than_attach_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(partitions, 'PARTITIONED', True)
+    db = str(tmp_path / 'sensors.db')
+    sqlite3.connect(db).execute(partitions.SCHEMA)
+    months = [f'{2025 + (m - 1) // 12}-{(m - 1) % 12 + 1:02d}' for m in range(1, partitions.MAX_ATTACHED + 5)]
+    for month in months:
+        fill(partitions.partition_path(db, partitions.month_of(month)), f'{month}-15')
+
+    archive.build(db, until='2026-12-31', delete=True)
+
+    assert archive.archived_days(db) == [f'{m}-15' for m in months]
+    conn = sqlite3.connect(partitions.partition_path(db, partitions.month_of(months[0])))
+    assert conn.execute('SELECT COUNT(*) FROM readings').fetchone()[0] == 0
+
+
+def test_round_trip_and_load_leading(tmp_path):
+    db = str(tmp_path / 'sensors.db')
+    rows = fill(db, '2026-09-01') + fill(db, '2026-09-02')
+    archive.build(db, until='2026-09-02', delete=True)  # 09-02 zostaje w bazie
+
+    data = archive.read(db, '2026-09-01', '2026-09-01')
+    assert len(data['timestamp']) == 50
+    assert np.allclose(data['co2'], [r[3] for r in rows[:50]])
+    assert np.allclose(data['pred_co2'], [r[9] for r in rows[:50]])
+
+    df, db_from = archive.load_leading(db, '2026-09-01', '2026-09-03', ['co2'])
+    assert db_from == '2026-09-02'
+    assert list(df['timestamp']) == [r[0] for r in rows[1:50]]  # wiersze > date_from
+
+
+def test_backtest_reads_archived_days(tmp_path):
+    import backtest
+
+    db = str(tmp_path / 'sensors.db')
+    rows = fill(db, '2026-09-01') + fill(db, '2026-09-02')
+    archive.build(db, until='2026-09-02', delete=True)
+
+    df = backtest.load_readings(db, '2026-09-01', '2026-09-03')
+    assert len(df) == len(rows) - 1
+    assert df['pred_co2'].notna().all()
+
+
+def count(db):
+    return sqlite3.connect(db).execute('SELECT COUNT(*) FROM readings').fetchone()[0]
+
+
+def test_delete_removes_days_archived_earlier(tmp_path):
+    db = str(tmp_path / 'sensors.db')
+    fill(db, '2026-09-01')
+    fill(db, '2026-09-02')
+    archive.build(db, until='2026-09-03')
+    assert count(db) == 100
+
+    archive.build(db, until='2026-09-03', delete=True)
+    assert count(db) == 0
+    assert len(archive.read(db, '2026-09-01', '2026-09-02')['timestamp']) == 100
+
+
+def test_delete_keeps_recent_days_by_default(tmp_path):
+    db = str(tmp_path / 'sensors.db')
+    today = datetime.now()
+    days = [(today - timedelta(days=d)).strftime('%Y-%m-%d') for d in (3, 2, 1)]
+    for day in days:
+        fill(db, day)
+
+    archive.build(db, delete=True)
+
+    assert archive.archived_days(db) == days[:1]
+    assert count(db) == 100  # wczoraj i przedwczoraj zostają w bazie
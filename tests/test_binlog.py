@@ -0,0 +1,45 @@
+import math
+import os
+
+import binlog
+
+
+def write(path, rows):
+    log = binlog.BinLogWriter(path, binlog.READINGS_COLUMNS)
+    for ts, values in rows:
+        log.append(ts, values)
+    log.close()
+
+
+def row(i):
+    return 1_790_000_000.0 + 10 * i, [21.5, 45.0, 600 + i, 1.0, 2.0, 3.0, 100.0, 50.0, None]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'readings.bin')
+    write(path, [row(i) for i in range(5)])
+    data = binlog.read(path)
+    assert list(data['ts']) == [row(i)[0] for i in range(5)]
+    assert list(data['co2']) == [600, 601, 602, 603, 604]
+    assert all(math.isnan(v) for v in data['pred_co2'])
+
+
+def test_torn_record_is_dropped_and_log_continues(tmp_path):
+    path = str(tmp_path / 'readings.bin')
+    write(path, [row(i) for i in range(3)])
+    size = os.path.getsize(path)
+
+    # Zanik zasilania w trakcie zapisu: na końcu pliku część rekordu
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * 17)
+    assert len(binlog.read(path)['ts']) == 3
+
+    # Ponowne otwarcie obcina niedokończony rekord, nowe rekordy trafiają na właściwe miejsce
+    log = binlog.BinLogWriter(path, binlog.READINGS_COLUMNS)
+    assert os.path.getsize(path) == size
+    log.append(*row(3))
+    log.close()
+
+    data = binlog.read(path)
+    assert list(data['ts']) == [row(i)[0] for i in range(4)]
+    assert list(data['co2']) == [600, 601, 602, 603]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import compact_model
+
+
+def test_round_trip_matches_sklearn(tmp_path):
+    # Liście są zapisywane jako float32 - zgodność do błędu zaokrąglenia
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1000, size=(400, 6))
+    y = X[:, 0] * 0.8 + np.sin(X[:, 1] / 50) * 30 + rng.normal(0, 5, 400)
+    model = RandomForestRegressor(n_estimators=20, max_depth=10, random_state=42).fit(X, y)
+
+    path = str(tmp_path / 'model.cfr')
+    compact_model.export(model, path)
+    forest = compact_model.CompactForest.load(path)
+
+    rows = rng.uniform(0, 1000, size=(200, 6)).tolist()
+    assert forest.n_features == 6
+    assert forest.predict(rows) == pytest.approx(model.predict(np.array(rows)).tolist(), rel=1e-5)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'model.cfr'
+    path.write_bytes(b'XXXX' + bytes(12))
+    with pytest.raises(ValueError):
+        compact_model.CompactForest.load(str(path))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import forecast
+from ring_buffer import Sample
+
+
+def feed(fc, times, co2, pred=None):
+    for i, (t, c) in enumerate(zip(times, co2)):
+        result = fc.update(Sample(ts=float(t), co2=float(c), pred_co2=None if pred is None else pred[i]))
+    return result
+
+
+def test_linear_ramp_gives_exact_slope():
+    fc = forecast.ThresholdForecast([1000, 1200])
+    times = np.arange(0, 600, 10)
+    result = feed(fc, times, 600 + 0.5 * times)
+
+    assert fc.slope == pytest.approx(0.5)
+    assert fc.level == pytest.approx(600 + 0.5 * times[-1])
+    # 1000 ppm za (1000 - 895) / 0.5 s = 3,5 min; 1200 ppm za 10,2 min
+    assert result == {1000: 4, 1200: 10}
+
+
+def test_shifted_sums_match_direct_weighted_regression():
+    rng = np.random.default_rng(5)
+    times = np.cumsum(rng.uniform(5, 15, 200))  # nierówne odstępy jak przy opóźnionych odczytach
+    co2 = 700 + 0.2 * times + rng.normal(0, 15, len(times))
+    fc = forecast.ThresholdForecast([])
+    feed(fc, times, co2)
+
+    # Regresja ważona wprost: czas względem ostatniej próbki, wagi exp(-wiek / tau)
+    t = times - times[-1]
+    w = np.exp(t / fc.tau)
+    A = np.vstack([np.ones_like(t), t]).T * np.sqrt(w)[:, None]
+    level, slope = np.linalg.lstsq(A, co2 * np.sqrt(w), rcond=None)[0]
+
+    assert fc.slope == pytest.approx(slope, rel=1e-6)
+    assert fc.level == pytest.approx(level, rel=1e-9)
+
+
+def test_model_prediction_is_averaged_into_slope():
+    fc = forecast.ThresholdForecast([1000])
+    times = np.arange(0, 300, 10)
+    feed(fc, times, np.full(len(times), 800.0), pred=[800.0 + 0.6 * forecast.MODEL_HORIZON_S] * len(times))
+    # Trend płaski (0), model: +0,6 ppm/s -> średnia 0,3 ppm/s
+    assert fc.slope == pytest.approx(0.3)
+
+
+def test_threshold_states():
+    fc = forecast.ThresholdForecast([1000, 1200])
+    assert feed(fc, [0, 10, 20], [1100, 1050, 1000]) == {1000: 0, 1200: None}
+    # Próbka z tym samym lub wcześniejszym czasem nie zmienia stanu
+    assert fc.update(Sample(ts=15.0, co2=2000.0)) == {1000: 0, 1200: None}
@@ -0,0 +1,27 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import partitions
+
+
+def test_split_moves_month_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(partitions, 'PARTITIONED', True)
+    db = str(tmp_path / 'sensors.db')
+    t0 = datetime(2026, 9, 30, 20, 0)
+    rows = [((t0 + timedelta(minutes=10 * i)).strftime('%Y-%m-%d %H:%M:%S'), 21.0, 45.0, 600 + i,
+             1.0, 2.0, 3.0, 100.0, 50.0, None, 1) for i in range(60)]
+    conn = sqlite3.connect(db)
+    conn.execute(partitions.SCHEMA)
+    conn.executemany(f'INSERT INTO readings ({partitions.COLUMNS}) VALUES ({", ".join("?" * 11)})', rows)
+    conn.commit()
+    conn.close()
+
+    partitions.split(db, chunk=7)  # 24 wiersze z września i 36 z października - kilka porcji na miesiąc
+
+    assert sqlite3.connect(db).execute('SELECT COUNT(*) FROM readings').fetchone()[0] == 0
+    assert partitions.list_months(db) == ['2026_09', '2026_10']
+    moved = []
+    for month in partitions.list_months(db):
+        part = sqlite3.connect(partitions.partition_path(db, month))
+        moved += part.execute('SELECT timestamp, co2 FROM readings ORDER BY rowid').fetchall()
+    assert moved == [(r[0], r[3]) for r in rows]
@@ -0,0 +1,73 @@
+import pytest
+
+import sensirion
+
+
+@pytest.mark.parametrize('pair, crc', [
+    ([0xBE, 0xEF], 0x92),  # przykład z kart katalogowych SHT4x/SGP40/SCD4x
+    ([0x80, 0x00], 0xA2),  # SGP40: domyślna wilgotność 50%
+    ([0x66, 0x66], 0x93),  # SGP40: domyślna temperatura 25 °C
+])
+def test_crc8_datasheet_vectors(pair, crc):
+    assert sensirion.crc8(pair) == crc
+
+
+def test_pack_unpack_round_trip():
+    data = sensirion.pack_words([0xBEEF, 0x0000, 0x01F4])
+    assert data[:3] == [0xBE, 0xEF, 0x92]
+    assert sensirion.unpack_words(data) == [0xBEEF, 0x0000, 0x01F4]
+
+
+def test_unpack_rejects_bad_crc():
+    data = sensirion.pack_words([0xBEEF])
+    data[2] ^= 0x01
+    with pytest.raises(sensirion.CRCError):
+        sensirion.unpack_words(data, sensirion.SHT40_ADDR)
+
+
+def test_scd41_convert_datasheet_example():
+    co2, temp, hum = sensirion.SCD41.convert([0x01F4, 0x6667, 0x5EB9])
+    assert co2 == 500
+    assert temp == pytest.approx(25.0, abs=0.01)
+    assert hum == pytest.approx(37.0, abs=0.01)
+
+
+class FakeMsg(list):
+    pass
+
+
+class FakeI2CMsg:
+    @staticmethod
+    def write(addr, data):
+        msg = FakeMsg(data)
+        msg.kind, msg.addr = 'w', addr
+        return msg
+
+    @staticmethod
+    def read(addr, n):
+        msg = FakeMsg([0] * n)
+        msg.kind, msg.addr = 'r', addr
+        return msg
+
+
+class FakeSMBus:
+    """Magistrala z jednym czujnikiem odpowiadającym stałymi słowami"""
+
+    def __init__(self, bus):
+        self.log = []
+
+    def i2c_rdwr(self, *msgs):
+        for msg in msgs:
+            self.log.append((msg.kind, msg.addr))
+            if msg.kind == 'r':
+                msg[:] = sensirion.pack_words([0x6667, 0x5EB9])[:len(msg)]
+
+
+def test_transfer_writes_waits_and_reads_separately(monkeypatch):
+    monkeypatch.setattr(sensirion, 'SMBus', FakeSMBus)
+    monkeypatch.setattr(sensirion, 'i2c_msg', FakeI2CMsg)
+    bus = sensirion.SensirionBus(1)
+
+    assert sensirion.SHT40(bus).measurements == pytest.approx((25.0, 40.25), abs=0.01)
+    assert bus.bus.log == [('w', sensirion.SHT40_ADDR), ('r', sensirion.SHT40_ADDR)]
+    assert bus.transfer(sensirion.SCD41_ADDR, [0x21, 0xB1]) == []
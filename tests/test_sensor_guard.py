@@ -0,0 +1,40 @@
+import threading
+
+from sensor_guard import BusGate, SensorGuard
+
+
+def test_hung_read_blocks_other_sensors_on_exclusive_bus():
+    release = threading.Event()
+    gate = BusGate(exclusive=True)
+    sht = SensorGuard('sht40', 0.05, bus=gate)
+    sgp = SensorGuard('sgp40', 0.05, bus=gate)
+    calls = []
+
+    assert sht.read(release.wait)[0] is None  # zawieszony odczyt
+    assert sgp.read(lambda: calls.append(1) or 100) == (None, None)
+    assert sht.read(lambda: calls.append(2) or (21, 40)) == (None, None)
+    assert calls == [] and sht.hung()
+
+    release.set()
+    sht._pending.result()
+    assert sgp.read(lambda: 100) == (100, None)
+    assert not sgp.degraded
+
+
+def test_shared_bus_allows_overlap():
+    release = threading.Event()
+    gate = BusGate(exclusive=False)
+    sht = SensorGuard('sht40', 0.05, bus=gate)
+    sgp = SensorGuard('sgp40', 0.05, bus=gate)
+    sht.read(release.wait)
+    assert sgp.read(lambda: 100) == (100, None)
+    release.set()
+
+
+def test_thread_fed_sensor_is_not_degraded_before_first_frame():
+    pms = SensorGuard('pms5003', 0.05)
+    assert pms.current() == (None, None)
+    assert not pms.degraded and pms.timeouts == 0
+    pms.update((1, 2, 3))
+    assert pms.first.is_set()
+    assert pms.current() == ((1, 2, 3), None)
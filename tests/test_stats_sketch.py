@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import stats_sketch
+from stats_sketch import QuantileSketch
+
+QUANTILES = [0.0, 0.01, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999, 1.0]
+
+
+def sketch_of(values):
+    s = QuantileSketch()
+    for v in values:
+        s.add(float(v))
+    return s
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(1).lognormal(6.5, 0.4, 20000),   # CO2 (ppm)
+    np.random.default_rng(2).normal(3, 8, 20000),           # temperatura na zewnątrz, także < 0
+    np.concatenate([np.zeros(500), np.random.default_rng(3).exponential(5, 5000)]),  # PM z zerami
+])
+def test_quantile_relative_error(values):
+    s = sketch_of(values)
+    for q in QUANTILES:
+        exact = np.quantile(values, q, method='lower')
+        assert abs(s.quantile(q) - exact) <= stats_sketch.RELATIVE_ACCURACY * abs(exact) + 1e-12
+
+
+def test_merge_equals_single_sketch():
+    values = np.random.default_rng(4).lognormal(6.5, 0.4, 6000)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 24):  # 24 godziny -> doba
+        merged.merge(sketch_of(part))
+    whole = sketch_of(values)
+
+    assert (merged.pos, merged.neg, merged.zero, merged.count) == (whole.pos, whole.neg, whole.zero, whole.count)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.sum == pytest.approx(whole.sum)
+    assert [merged.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+
+
+def test_json_round_trip():
+    s = sketch_of([-2.5, 0, 0, 1.0, 450, 1200])
+    restored = QuantileSketch.from_row(s.count, s.min, s.max, s.sum, s.to_json())
+    assert [restored.quantile(q) for q in QUANTILES] == [s.quantile(q) for q in QUANTILES]
+
+
+def test_empty_sketch():
+    assert QuantileSketch().quantile(0.5) is None
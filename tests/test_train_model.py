@@ -0,0 +1,30 @@
+from sklearn.ensemble import RandomForestRegressor
+
+import compact_model
+import train_model
+
+
+def model(value):
+    return RandomForestRegressor(n_estimators=2, random_state=0).fit([[0] * 6, [1] * 6], [value, value])
+
+
+def predictions(tmp_path):
+    import joblib
+    pkl = joblib.load(tmp_path / 'co2_model.pkl').predict([[0] * 6])[0]
+    cfr = compact_model.CompactForest.load(str(tmp_path / 'co2_model.cfr')).predict_one([0] * 6)
+    return pkl, cfr
+
+
+def test_publish_and_rollback_keep_pairs(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_model, 'MODEL_PATH', str(tmp_path / 'co2_model.pkl'))
+    monkeypatch.setattr(train_model, 'COMPACT_MODEL_PATH', str(tmp_path / 'co2_model.cfr'))
+    monkeypatch.setattr(train_model, 'STATE_PATH', str(tmp_path / 'state.json'))
+
+    train_model.publish(model(500))
+    assert not (tmp_path / 'co2_model.pkl.prev').exists()
+    train_model.publish(model(800))
+    assert predictions(tmp_path) == (800, 800)
+
+    assert train_model.rollback()
+    assert predictions(tmp_path) == (500, 500)
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')) == []
@@ -0,0 +1,108 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import partitions
+import uplink
+
+
+def make_rows(start, n):
+    t0 = datetime.strptime(start, '%Y-%m-%d %H:%M:%S')
+    return [((t0 + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'), 21.0, 45.0, 600 + i,
+             1.0, 2.0, 3.0, 100.0, 50.0, None, 2) for i in range(n)]
+
+
+def insert(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(partitions.SCHEMA)
+    conn.executemany(f'INSERT INTO readings ({partitions.COLUMNS}) VALUES ({", ".join("?" * 11)})', rows)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def station(tmp_path, monkeypatch):
+    """sensors.db z 60 wierszami z końca września i 40 z października; 60 pierwszych już wysłane"""
+    db = str(tmp_path / 'sensors.db')
+    rows = make_rows('2026-09-30 23:00:00', 100)
+    insert(db, rows)
+    state = str(tmp_path / 'uplink_state.json')
+    sent = []
+
+    def post_batch(url, body, timeout=30):
+        payload = uplink.decode_batch(body, 'gzip')
+        sent.extend(row[1] for row in payload['rows'])
+        return len(payload['rows'])
+
+    monkeypatch.setattr(uplink, 'post_batch', post_batch)
+    monkeypatch.setattr(partitions, 'PARTITIONED', True)
+    return db, state, rows, sent
+
+
+def old_cursor(state, last_id):
+    # Format sprzed partycji: sam rowid w sensors.db
+    with open(state, 'w') as f:
+        json.dump({'last_id': last_id}, f)
+
+
+def test_migration_before_split_sends_main_then_partition(station):
+    db, state, rows, sent = station
+    old_cursor(state, 60)
+    new = make_rows('2026-10-01 02:00:00', 5)
+    path = partitions.partition_path(db, '2026_10')
+    partitions.ensure_partition(path)
+    insert(path, new)
+
+    up = uplink.Uplink('http://test', 'st', db, state, batch=7)
+    assert up.drain() == 45
+    assert sent == [r[0] for r in rows[60:] + new]
+
+
+def test_migration_after_split_skips_only_sent_rows(station):
+    db, state, rows, sent = station
+    old_cursor(state, 60)
+    up = uplink.Uplink('http://test', 'st', db, state, batch=7)  # kursor odczytany przed split
+    partitions.split(db)
+
+    assert up.drain() == 40
+    assert sent == [r[0] for r in rows[60:]]
+
+
+def test_old_cursor_after_split_resends_instead_of_losing(station):
+    db, state, rows, sent = station
+    old_cursor(state, 60)
+    partitions.split(db)
+
+    up = uplink.Uplink('http://test', 'st', db, state, batch=7)
+    assert up.drain() == 100
+    assert sent == [r[0] for r in rows]
+
+
+@pytest.mark.parametrize('payload', [
+    [1, 2, 3],
+    {'station_id': 'st', 'columns': ['seq'] + uplink.COLUMNS, 'rows': 'x'},
+    {'station_id': 'st', 'columns': ['seq'] + uplink.COLUMNS, 'rows': [[1, '2026-10-01 00:00:00']]},
+    {'station_id': 'st', 'columns': ['seq'] + uplink.COLUMNS, 'rows': [['1'] + [None] * len(uplink.COLUMNS)]},
+    {'station_id': 'st', 'columns': ['seq'] + uplink.COLUMNS,
+     'rows': [[1, '2026-10-01 00:00:00', 'ciepło'] + [None] * (len(uplink.COLUMNS) - 2)]},
+])
+def test_ingest_rejects_malformed_batch(tmp_path, monkeypatch, payload):
+    import app
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(uplink, 'INGEST_TOKEN', '')
+    resp = app.app.test_client().post('/api/ingest', data=json.dumps(payload))
+    assert resp.status_code == 400
+
+
+def test_ingest_stores_valid_batch(tmp_path, monkeypatch):
+    import app
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(uplink, 'INGEST_TOKEN', '')
+    rows = [(i + 1, *r) for i, r in enumerate(make_rows('2026-10-01 00:00:00', 3))]
+    body = uplink.encode_batch('st', rows)
+    resp = app.app.test_client().post('/api/ingest', data=body, headers={'Content-Encoding': 'gzip'})
+    assert resp.get_json()['received'] == 3